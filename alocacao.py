@@ -1,6 +1,11 @@
-from typing import Any, Dict, List, Union
+import multiprocessing
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+from cardinality import CardinalityEncoder
+from cdcl import CDCLSolver
+from coloring import dsatur, exact_coloring, greedy_clique
 from formula import And, Atom, Not, Or
+from stats import SolverStats
 
 
 class Course:
@@ -72,20 +77,14 @@ def and_all(logic_formulas) -> And:
     """
     Receive a list of logic formulas and apply the "and" logic operator on them.
     """
-    ands = logic_formulas[0]
-    for i in range(1, len(logic_formulas)):
-        ands = And(ands, logic_formulas[i])
-    return ands
+    return And(*logic_formulas)
 
 
 def or_all(logic_formulas) -> Or:
     """
     Receive a list of logic formulas and apply the "or" logic operator on them.
     """
-    ors = logic_formulas[0]
-    for i in range(1, len(logic_formulas)):
-        ors = Or(ors, logic_formulas[i])
-    return ors
+    return Or(*logic_formulas)
 
 
 def period_restriction(courses_atoms: List[Atom]) -> And:
@@ -211,3 +210,339 @@ def professor_restriction_formula(courses: List[Course], qtd_periods: int) -> Di
                                        and_all(possible_periods[professor]),
                                        and_all(allow_course_in_one_period[professor])])
     return formulas
+
+
+def course_period_variable(course_index: int, period: int, qtd_periods: int) -> int:
+    """
+    Return the DIMACS variable that represents the course with index 'course_index' being taught
+    at 'period' (from 1 to qtd_periods).
+    """
+    return course_index * qtd_periods + period
+
+
+def course_conflicts(courses: List[Course]) -> Tuple[Dict[str, int], List[List[int]], List[Tuple[int, int]]]:
+    """
+    Numbers the courses by name, from 0, and finds which of them can't share a period.
+    Return the index of each course name, the groups of course indexes with the same semester or the same
+    professor, and the sorted pairs (i, j), i < j, of courses that share a group.
+    """
+    course_index: Dict[str, int] = {}
+    for c in courses:
+        if c.name not in course_index:
+            course_index[c.name] = len(course_index)
+
+    # dicts keep the first occurrence of each course in order, with O(1) lookups for the repeated ones
+    courses_by_semester: Dict[str, Dict[int, None]] = {}
+    courses_by_professor: Dict[str, Dict[int, None]] = {}
+    for c in courses:
+        for group, key in ((courses_by_semester, c.semester), (courses_by_professor, c.professor)):
+            if key not in group:
+                group[key] = {}
+            group[key][course_index[c.name]] = None
+    groups = [list(group) for group in list(courses_by_semester.values()) + list(courses_by_professor.values())]
+
+    # a pair of courses that share the semester and the professor only needs to be restricted once
+    conflicts = set()
+    for group in groups:
+        for a in range(len(group) - 1):
+            for b in range(a + 1, len(group)):
+                conflicts.add((min(group[a], group[b]), max(group[a], group[b])))
+
+    return course_index, groups, sorted(conflicts)
+
+
+def courses_to_clauses(courses: List[Course], qtd_periods: int, encoding: str = "commander", symmetry: bool = False,
+                       stats: Optional[SolverStats] = None) -> Tuple[List[List[int]], Dict[int, str]]:
+    """
+    Same restrictions of period_restriction_for_all_semesters_formula and professor_restriction_formula,
+    but written directly as clauses in integer form, without building formulas.
+    Each course must be taught in exactly one period, and two different courses of the same semester, or
+    of the same professor, can't be taught in the same period. Courses with the same name are the same
+    course, like in the formulas.
+    The "at most one" constraints, a course in at most one period and at most one course of each semester or
+    professor in a period, are written with the cardinality 'encoding' (see cardinality.py), so the number of
+    clauses grows linearly with the size of the groups instead of quadratically. The auxiliary variables come
+    after the variables of the courses.
+    With 'symmetry' the clauses of symmetry_breaking_clauses are added too.
+    The time spent is added to the "encode" phase of 'stats' when it is given.
+
+    Return the clauses and a dictionary that maps each variable to the name of its atom in the formulas.
+    Example:
+        [[1, 2], [-1, -2], [3, 4], [-3, -4], [-1, -3], [-2, -4]], {1: 'POO_1', 2: 'POO_2', 3: 'Grafos_1', ...}
+    """
+    if stats is None:
+        stats = SolverStats()
+    with stats.phase("encode"):
+        course_index, groups, conflicts = course_conflicts(courses)
+        cardinality = CardinalityEncoder(len(course_index) * qtd_periods, encoding)
+
+        clauses: List[List[int]] = []
+        names: Dict[int, str] = {}
+        for name, i in course_index.items():
+            variables = [course_period_variable(i, p, qtd_periods) for p in range(1, qtd_periods + 1)]
+            for p, variable in enumerate(variables, 1):
+                names[variable] = f"{name}_{p}"
+
+            clauses.append(variables)
+            clauses.extend(cardinality.at_most(variables, 1))
+
+        for group in groups:
+            for p in range(1, qtd_periods + 1):
+                clauses.extend(cardinality.at_most([course_period_variable(i, p, qtd_periods) for i in group], 1))
+
+        if symmetry:
+            clauses.extend(symmetry_breaking_clauses(len(course_index), groups, conflicts, qtd_periods))
+
+        return clauses, names
+
+
+def symmetry_breaking_clauses(total_courses: int, groups: List[List[int]], conflicts: List[Tuple[int, int]],
+                              qtd_periods: int) -> List[List[int]]:
+    """
+    Clauses that keep only some of the schedules that are the same up to renaming the periods or swapping
+    interchangeable courses, so a solver proving that there is no schedule doesn't go through each one of them.
+    At least one schedule of each kind is kept, so the clauses don't change whether a schedule exists, also when
+    fewer periods than 'qtd_periods' are allowed, as in minimum_periods.
+
+    - The courses of a clique of the conflict graph all have different periods, so they are fixed to the
+      periods 1, 2, 3, ... in the order of their indexes. With more courses in the clique than periods,
+      this leaves no period for the remaining ones and unit propagation alone finds the conflict.
+    - The other courses are taken in the order of their indexes, and the t-th course in the whole order,
+      counting the clique first and from 0, can't use a period after t + 1. A schedule whose new periods
+      are numbered in the order they first appear satisfies this.
+    - Courses in exactly the same semesters and professors can swap periods, so each one must have a
+      period before the next of them, in the order of their indexes.
+    """
+    neighbors = conflict_graph(total_courses, conflicts)
+    clique = sorted(greedy_clique(neighbors))
+    in_clique = set(clique)
+    order = clique + [i for i in range(total_courses) if i not in in_clique]
+
+    clauses: List[List[int]] = []
+    for t, i in enumerate(order):
+        if i in in_clique:
+            if t < qtd_periods:
+                clauses.append([course_period_variable(i, t + 1, qtd_periods)])
+        else:
+            clauses.extend([-course_period_variable(i, p, qtd_periods)] for p in range(t + 2, qtd_periods + 1))
+
+    course_groups: Dict[int, List[int]] = {}
+    for g, group in enumerate(groups):
+        for i in group:
+            course_groups.setdefault(i, []).append(g)
+    interchangeable: Dict[Tuple[int, ...], List[int]] = {}
+    for i in range(total_courses):
+        interchangeable.setdefault(tuple(course_groups.get(i, ())), []).append(i)
+
+    for same in interchangeable.values():
+        for i, j in zip(same, same[1:]):
+            for p in range(1, qtd_periods + 1):
+                clauses.append([-course_period_variable(j, p, qtd_periods)] +
+                               [course_period_variable(i, q, qtd_periods) for q in range(1, p)])
+    return clauses
+
+
+def conflict_graph(total_courses: int, conflicts: List[Tuple[int, int]]) -> List[List[int]]:
+    """
+    Return the adjacency lists of the conflict graph: the indexes of the courses each course conflicts with.
+    """
+    neighbors: List[List[int]] = [[] for _ in range(total_courses)]
+    for i, j in conflicts:
+        neighbors[i].append(j)
+        neighbors[j].append(i)
+    return neighbors
+
+
+def minimum_periods(courses: List[Course], solver: Any, strategy: str = "binary",
+                    symmetry: bool = True) -> Tuple[int, Dict[str, int]]:
+    """
+    Finds the smallest number of periods in which the courses can be taught.
+    'solver' is an empty incremental SAT solver with add_clause, solve(assumptions) and get_model, like
+    cdcl.CDCLSolver or the solvers of PySAT.
+
+    No schedule can be shorter than the largest semester or professor load, or than a clique of the conflict
+    graph, and a DSATUR colouring of the graph (see coloring.py) gives an upper bound. The clauses of
+    courses_to_clauses are written once for the upper bound, with a variable "period p is used" for each
+    period, implied by every course taught at p and by period p + 1 being used. Each number of periods k is
+    then checked by one call to solve() assuming that period k + 1 is not used, so the clauses learned by one
+    check are kept for the next ones. With strategy="binary" the candidates are binary searched, and a
+    schedule found with k periods lowers the upper bound to the periods it uses; with strategy="upward" they
+    are tried from the lower bound up. Every check but the last one is unsatisfiable, which is what the
+    clauses of symmetry_breaking_clauses, added when 'symmetry' is True, speed up.
+
+    Return the number of periods and the period (from 1) of each course, for example (2, {'POO': 1, 'Grafos': 2}).
+    """
+    if strategy not in ("binary", "upward"):
+        raise ValueError(f"Unknown search strategy: {strategy}")
+
+    course_index, groups, conflicts = course_conflicts(courses)
+    if not course_index:
+        return 0, {}
+
+    neighbors = conflict_graph(len(course_index), conflicts)
+    colors = dsatur(neighbors)
+    best = max(colors) + 1
+    schedule = {name: colors[i] + 1 for name, i in course_index.items()}
+    lower = max(max(len(group) for group in groups), len(greedy_clique(neighbors)))
+    if lower >= best:
+        return best, schedule
+
+    qtd_periods = best
+    clauses, _ = courses_to_clauses(courses, qtd_periods, symmetry=symmetry)
+    top = max(abs(literal) for clause in clauses for literal in clause)
+    used = [0] + [top + p for p in range(1, qtd_periods + 1)]
+    for clause in clauses:
+        solver.add_clause(clause)
+    for i in course_index.values():
+        for p in range(1, qtd_periods + 1):
+            solver.add_clause([-course_period_variable(i, p, qtd_periods), used[p]])
+    for p in range(1, qtd_periods):
+        solver.add_clause([-used[p + 1], used[p]])
+
+    def check(k: int) -> bool:
+        nonlocal best, schedule
+        if not solver.solve(assumptions=[-used[k + 1]]):
+            return False
+        model = set(solver.get_model())
+        schedule = {name: p for name, i in course_index.items()
+                    for p in range(1, qtd_periods + 1) if course_period_variable(i, p, qtd_periods) in model}
+        best = max(schedule.values())
+        return True
+
+    if strategy == "upward":
+        for k in range(lower, best):
+            if check(k):
+                break
+    else:
+        while lower < best:
+            k = (lower + best) // 2
+            if not check(k):
+                lower = k + 1
+
+    return best, schedule
+
+
+# larger components are left to the SAT solver: the branch and bound rarely finishes on them
+EXACT_COLORING_MAX_COURSES = 200
+
+
+def conflict_components(courses: List[Course]) -> List[List[Course]]:
+    """
+    Splits the courses into the connected components of the conflict graph, where two courses are adjacent
+    when they share a semester or a professor. Courses of different components never restrict each other,
+    so each component can be scheduled on its own. The largest components come first.
+    """
+    course_index, _, conflicts = course_conflicts(courses)
+    parent = list(range(len(course_index)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in conflicts:
+        parent[find(i)] = find(j)
+
+    components: Dict[int, List[Course]] = {}
+    for c in courses:
+        components.setdefault(find(course_index[c.name]), []).append(c)
+    return sorted(components.values(), key=len, reverse=True)
+
+
+def solve_component(courses: List[Course], qtd_periods: int) -> Optional[Dict[str, int]]:
+    """
+    Schedules the courses in 'qtd_periods' periods.
+    The conflict graph is coloured with DSATUR first, which is usually enough. Otherwise a clique with more than
+    'qtd_periods' courses proves there is no schedule, or, for components with at most EXACT_COLORING_MAX_COURSES
+    courses, a short branch and bound search settles the question.
+    Only when both fail the clauses are written and solved with CDCLSolver, which starts from the periods of
+    the DSATUR colouring.
+    Return the period (from 1) of each course, or None if there is no valid schedule.
+    """
+    course_index, _, conflicts = course_conflicts(courses)
+    neighbors = conflict_graph(len(course_index), conflicts)
+    colors = dsatur(neighbors)
+    if max(colors, default=-1) < qtd_periods:
+        return {name: colors[i] + 1 for name, i in course_index.items()}
+    if len(greedy_clique(neighbors)) > qtd_periods:
+        return None
+
+    exact = exact_coloring(neighbors, qtd_periods) if len(neighbors) <= EXACT_COLORING_MAX_COURSES else None
+    if exact is False:
+        return None
+    if exact is not None:
+        return {name: exact[i] + 1 for name, i in course_index.items()}
+
+    solver = CDCLSolver(courses_to_clauses(courses, qtd_periods, symmetry=True)[0])
+    solver.set_phases([course_period_variable(i, colors[i] + 1, qtd_periods)
+                       for i in range(len(colors)) if colors[i] < qtd_periods])
+    if not solver.solve():
+        return None
+    model = solver.model()
+    return {name: p for name, i in course_index.items()
+            for p in range(1, qtd_periods + 1) if model.get(course_period_variable(i, p, qtd_periods))}
+
+
+def component_worker(qtd_periods: int, tasks: Any, results: Any) -> None:
+    try:
+        while True:
+            component = tasks.get()
+            if component is None:
+                return
+            results.put((solve_component(component, qtd_periods), None))
+    except Exception as error:
+        results.put((None, repr(error)))
+
+
+def solve_components(courses: List[Course], qtd_periods: int, max_workers: Optional[int] = None) -> Optional[Dict[str, int]]:
+    """
+    Schedules the courses in 'qtd_periods' periods, solving each component of conflict_components in a separate
+    process, so the time is set by the hardest component instead of the sum of all of them. Courses without
+    conflicts get the first period, and a single component is solved in this process. The first component
+    without a schedule terminates the other processes.
+    Return the period (from 1) of each course, or None if some component has no valid schedule.
+    """
+    if qtd_periods < 1:
+        return {} if not courses else None
+
+    schedule: Dict[str, int] = {}
+    components = []
+    for component in conflict_components(courses):
+        if len({c.name for c in component}) == 1:
+            schedule[component[0].name] = 1
+        else:
+            components.append(component)
+
+    if len(components) == 1:
+        partial = solve_component(components[0], qtd_periods)
+        if partial is None:
+            return None
+        schedule.update(partial)
+    elif components:
+        tasks: Any = multiprocessing.Queue()
+        results: Any = multiprocessing.Queue()
+        # daemons, so they are terminated when this process exits, even if it never reaches the finally below
+        processes = [multiprocessing.Process(target=component_worker, args=(qtd_periods, tasks, results), daemon=True)
+                     for _ in range(min(max_workers or multiprocessing.cpu_count(), len(components)))]
+        for component in components:
+            tasks.put(component)
+        for process in processes:
+            tasks.put(None)
+            process.start()
+
+        try:
+            for _ in components:
+                partial, error = results.get()
+                if error is not None:
+                    raise RuntimeError(f"A component worker failed: {error}")
+                if partial is None:
+                    return None
+                schedule.update(partial)
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+    return {c.name: schedule[c.name] for c in courses}
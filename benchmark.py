@@ -0,0 +1,445 @@
+"""Benchmarks of the satisfiability engines on deterministic instances.
+
+Every instance is generated from a fixed seed, so two runs of the same version solve the same clauses:
+
+- courses: random course lists for alocacao.courses_to_clauses, from 200 to 28910 atoms like the runs of
+  benchmark_result.txt;
+- sudoku: sudokus of size n² with part of the cells given;
+- mines: minesweeper boards with part of the squares revealed and the total number of mines known;
+- dimacs: the uf50 (satisfiable) and uuf50 (unsatisfiable) files in testes_DIMACS_CNF.
+
+The portfolio engine (portfolio.py) runs several solver processes itself, so its times are wall times on
+every core of the machine.
+
+Each engine runs each instance in a separate process, stopped after the timeout of the engine, and the report
+has the time, result, peak resident memory and clauses per second of every run, and the percentiles of the
+times of each engine in each suite.
+
+python benchmark.py  # every suite and engine, JSON report on the standard output
+python benchmark.py --suite dimacs --engine cdcl --engine dpll --timeout 60 --timeout dpll=120 --repeat 5 --output result.json
+python benchmark.py --legacy > benchmark_result.txt  # the text report of benchmark_result.txt
+"""
+
+
+import argparse
+import glob
+import json
+import math
+import multiprocessing
+import os
+import random
+import resource
+import signal
+import sys
+import time
+
+from alocacao import Course, courses_to_clauses
+from cardinality import CardinalityEncoder
+from cnf_dimacs import CNFDimacsParser
+from formula import And, Atom, Not, Or
+from portfolio import solve_portfolio
+from semantics import cdcl, dpll, is_satisfiable, resolution
+
+try:
+    from pysat.solvers import Glucose3
+except ImportError:
+    Glucose3 = None
+
+
+DIMACS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "testes_DIMACS_CNF")
+
+
+class Instance:
+    def __init__(self, name, clauses, total_atoms, expected=None):
+        self.name = name
+        self.clauses = clauses
+        self.total_atoms = total_atoms
+        self.expected = expected  # True (satisfiable), False (unsatisfiable) or None (unknown)
+
+
+def random_courses(total_courses, qtd_periods, seed):
+    """
+    Returns 'total_courses' courses in semesters of qtd_periods - 1 courses, taught by professors with
+    about qtd_periods / 2 courses each, picked at random.
+    """
+    rng = random.Random(seed)
+    per_semester = max(qtd_periods - 1, 1)
+    total_professors = max(total_courses * 2 // max(qtd_periods, 1), 1)
+    return [Course(f"C{i}", f"s{i // per_semester}", f"P{rng.randrange(total_professors)}")
+            for i in range(total_courses)]
+
+
+def course_instances(seed=0):
+    # atoms = courses * periods: 200, 366, 576, ..., 2760 and 28910
+    sizes = [(50 + 11 * i, 4 + 2 * i) for i in range(9)] + [(5782, 5)]
+    instances = []
+    for total_courses, qtd_periods in sizes:
+        clauses, _ = courses_to_clauses(random_courses(total_courses, qtd_periods, seed), qtd_periods)
+        instances.append(Instance(f"courses-{total_courses}x{qtd_periods}", clauses, total_courses * qtd_periods))
+    return instances
+
+
+def sudoku_grid(n, seed, blanks=0.6):
+    """
+    Returns a sudoku of size n² (a list of rows, 0 for an empty cell) that has a solution, made by shuffling
+    the digits, rows and columns of a pattern and then emptying a fraction 'blanks' of the cells.
+    """
+    rng = random.Random(seed)
+    size = n * n
+    digits = list(range(1, size + 1))
+    rng.shuffle(digits)
+
+    def shuffled_lines():
+        bands = list(range(n))
+        rng.shuffle(bands)
+        lines = []
+        for band in bands:
+            inside = list(range(n))
+            rng.shuffle(inside)
+            lines.extend(band * n + i for i in inside)
+        return lines
+
+    rows, columns = shuffled_lines(), shuffled_lines()
+    grid = [[digits[(n * (r % n) + r // n + c) % size] for c in columns] for r in rows]
+    for r in range(size):
+        for c in range(size):
+            if rng.random() < blanks:
+                grid[r][c] = 0
+    return grid
+
+
+def sudoku_clauses(grid):
+    """
+    Returns the clauses of a sudoku, where the variable (r * size + c) * size + d + 1 means that the cell
+    (r, c) has the digit d + 1, and the total number of variables.
+    """
+    size = len(grid)
+    n = int(round(math.sqrt(size)))
+    cardinality = CardinalityEncoder(size ** 3)
+
+    def variable(r, c, d):
+        return (r * size + c) * size + d + 1
+
+    units = []
+    for r in range(size):
+        for c in range(size):
+            units.append([variable(r, c, d) for d in range(size)])
+    for d in range(size):
+        for r in range(size):
+            units.append([variable(r, c, d) for c in range(size)])
+        for c in range(size):
+            units.append([variable(r, c, d) for r in range(size)])
+        for box in range(size):
+            units.append([variable(box // n * n + i // n, box % n * n + i % n, d) for i in range(size)])
+
+    clauses = []
+    for group in units:
+        clauses.extend(cardinality.exactly(group, 1))
+    for r in range(size):
+        for c in range(size):
+            if grid[r][c]:
+                clauses.append([variable(r, c, grid[r][c] - 1)])
+    return clauses, cardinality.total_atoms
+
+
+def sudoku_instances(seed=0):
+    instances = []
+    for n in (2, 3, 4, 5):
+        clauses, total_atoms = sudoku_clauses(sudoku_grid(n, seed))
+        instances.append(Instance(f"sudoku-{n * n}x{n * n}", clauses, total_atoms, True))
+    return instances
+
+
+def minesweeper_clauses(rows, columns, mines, seed, revealed=0.5):
+    """
+    Places 'mines' mines at random on a board and reveals a fraction 'revealed' of the other squares.
+    Returns the clauses of the board: no mine in the revealed squares, exactly k mines around a square that
+    shows k, and exactly 'mines' mines in total. The variable i * columns + j + 1 means a mine in (i, j).
+    """
+    rng = random.Random(seed)
+    squares = [(i, j) for i in range(rows) for j in range(columns)]
+    placed = set(rng.sample(squares, mines))
+    cardinality = CardinalityEncoder(rows * columns)
+
+    def variable(i, j):
+        return i * columns + j + 1
+
+    clauses = cardinality.exactly([variable(i, j) for i, j in squares], mines)
+    for i, j in squares:
+        if (i, j) in placed or rng.random() >= revealed:
+            continue
+        neighbors = [(i + a, j + b) for a in (-1, 0, 1) for b in (-1, 0, 1)
+                     if (a, b) != (0, 0) and 0 <= i + a < rows and 0 <= j + b < columns]
+        clauses.append([-variable(i, j)])
+        clauses.extend(cardinality.exactly([variable(a, b) for a, b in neighbors],
+                                           sum((a, b) in placed for a, b in neighbors)))
+    return clauses, cardinality.total_atoms
+
+
+def minesweeper_instances(seed=0):
+    instances = []
+    for rows, columns, mines in ((8, 8, 10), (16, 16, 40), (16, 30, 99)):
+        clauses, total_atoms = minesweeper_clauses(rows, columns, mines, seed)
+        instances.append(Instance(f"mines-{rows}x{columns}-{mines}", clauses, total_atoms, True))
+    return instances
+
+
+def dimacs_instances(seed=0):
+    parser = CNFDimacsParser()
+    instances = []
+    for path in sorted(glob.glob(os.path.join(DIMACS_DIRECTORY, "*", "*.cnf"))):
+        clauses = parser.parse(path)
+        name = os.path.basename(path)
+        instances.append(Instance(name[:-len(".cnf")], clauses, parser.total_atoms, not name.startswith("uuf")))
+    return instances
+
+
+SUITES = {
+    "courses": course_instances,
+    "sudoku": sudoku_instances,
+    "mines": minesweeper_instances,
+    "dimacs": dimacs_instances,
+}
+
+
+def clauses_to_formula(clauses):
+    return And(*[Or(*[Atom(str(literal)) if literal > 0 else Not(Atom(str(-literal))) for literal in clause])
+                 for clause in clauses])
+
+
+def run_is_satisfiable(clauses):
+    return is_satisfiable(clauses_to_formula(clauses)) is not False
+
+
+def run_resolution(clauses):
+    return resolution(clauses) is not False
+
+
+def run_dpll(clauses):
+    return dpll(clauses) is not False
+
+
+def run_cdcl(clauses):
+    return cdcl(clauses) is not False
+
+
+def run_preprocess(clauses):
+    return cdcl(clauses, preprocess=True) is not False
+
+
+def run_portfolio(clauses):
+    return solve_portfolio(clauses)[0] is not False
+
+
+def run_pysat(clauses):
+    with Glucose3(bootstrap_with=clauses) as solver:
+        return solver.solve()
+
+
+ENGINES = {
+    "is_satisfiable": run_is_satisfiable,
+    "resolution": run_resolution,
+    "dpll": run_dpll,
+    "cdcl": run_cdcl,
+    "preprocess": run_preprocess,
+    "portfolio": run_portfolio,
+    "pysat": run_pysat,
+}
+
+DEFAULT_TIMEOUTS = {"is_satisfiable": 60, "resolution": 60, "dpll": 300, "cdcl": 300, "preprocess": 300, "portfolio": 300, "pysat": 300}
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # bytes on macOS, kilobytes on Linux
+
+
+def run_child(engine, clauses, connection):
+    # a process group of its own, so run_once also stops the processes the engine starts (portfolio, cubes)
+    os.setpgrp()
+    sys.setrecursionlimit(100000)
+    start = time.perf_counter()
+    try:
+        result = ENGINES[engine](clauses)
+        connection.send((result, time.perf_counter() - start, peak_rss_kb(), None))
+    except Exception as error:
+        connection.send((None, time.perf_counter() - start, peak_rss_kb(), repr(error)))
+    connection.close()
+
+
+def run_once(engine, instance, timeout):
+    """
+    Runs the engine on the instance in a new process, which is stopped with every process it started after
+    'timeout' seconds.
+    Return a dictionary with the result ("SAT", "UNSAT", "TIMEOUT" or "ERROR"), the time in seconds and the
+    peak resident memory of the process in kilobytes.
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=run_child, args=(engine, instance.clauses, sender))
+    process.start()
+    sender.close()
+
+    run = {"result": "TIMEOUT", "time": None, "peak_rss_kb": None}
+    if receiver.poll(timeout):
+        try:
+            result, elapsed, peak, error = receiver.recv()
+        except EOFError:
+            result, elapsed, peak, error = None, None, None, "the process ended without a result"
+        run.update(time=elapsed, peak_rss_kb=peak)
+        if error is not None:
+            run.update(result="ERROR", error=error)
+        else:
+            run["result"] = "SAT" if result else "UNSAT"
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass  # the child and every process it started have already ended
+    if process.is_alive():
+        process.terminate()  # stopped before it could create its group
+    process.join()
+    receiver.close()
+    return run
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty list of values."""
+    values = sorted(values)
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+def summarize(times):
+    if not times:
+        return None
+    return {
+        "min": min(times),
+        "p50": percentile(times, 50),
+        "p90": percentile(times, 90),
+        "p99": percentile(times, 99),
+        "max": max(times),
+        "mean": sum(times) / len(times),
+        "total": sum(times),
+    }
+
+
+def benchmark(suites, engines, timeouts, repeat=1, seed=0, log=None):
+    """
+    Runs every engine on every instance of the suites 'repeat' times.
+    Return the report as a dictionary, ready to be written as JSON.
+    """
+    report = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "seed": seed,
+        "repeat": repeat,
+        "timeouts": {engine: timeouts[engine] for engine in engines},
+        "suites": {},
+    }
+
+    for suite in suites:
+        instances = SUITES[suite](seed)
+        suite_report = report["suites"][suite] = {}
+        for engine in engines:
+            if engine == "pysat" and Glucose3 is None:
+                suite_report[engine] = {"skipped": "pysat is not installed"}
+                continue
+
+            times = []
+            timeouts_reached = 0
+            runs = []
+            for instance in instances:
+                instance_runs = [run_once(engine, instance, timeouts[engine]) for _ in range(repeat)]
+                solved = [run["time"] for run in instance_runs if run["result"] in ("SAT", "UNSAT")]
+                timeouts_reached += sum(run["result"] == "TIMEOUT" for run in instance_runs)
+                times.extend(solved)
+
+                median = percentile(solved, 50) if solved else None
+                results = {run["result"] for run in instance_runs}
+                entry = {
+                    "instance": instance.name,
+                    "atoms": instance.total_atoms,
+                    "clauses": len(instance.clauses),
+                    "result": results.pop() if len(results) == 1 else sorted(results),
+                    "times": [run["time"] for run in instance_runs],
+                    "median_time": median,
+                    "clauses_per_second": len(instance.clauses) / median if median else None,
+                    "peak_rss_kb": max((run["peak_rss_kb"] for run in instance_runs if run["peak_rss_kb"]), default=None),
+                }
+                errors = [run["error"] for run in instance_runs if "error" in run]
+                if errors:
+                    entry["errors"] = errors
+                if instance.expected is not None and entry["result"] in ("SAT", "UNSAT"):
+                    entry["correct"] = (entry["result"] == "SAT") == instance.expected
+                runs.append(entry)
+                if log:
+                    print(f"{suite} {engine} {instance.name}: {entry['result']} {median}", file=log, flush=True)
+
+            suite_report[engine] = {"runs": runs, "timeouts": timeouts_reached, "time": summarize(times)}
+    return report
+
+
+def legacy_report(timeout=300, seed=0, out=sys.stdout):
+    """
+    Writes the text report of benchmark_result.txt: is_satisfiable, DPLL and PySat on the course instances.
+    """
+    instances = course_instances(seed)
+    for engine, title in (("is_satisfiable", "is_satisfiable"), ("dpll", "DPLL"), ("pysat", "PySat")):
+        if engine == "pysat" and Glucose3 is None:
+            continue
+        print(f"BENCHMARK {title}", file=out)
+        times = []
+        for instance in instances:
+            print(f"Formula with {instance.total_atoms} atoms!", file=out)
+            run = run_once(engine, instance, timeout)
+            if run["result"] == "TIMEOUT":
+                print(f"Atingiu limite de {timeout // 60} minutos!", file=out)
+            else:
+                times.append(run["time"])
+                print(f"Done in {run['time']} seconds!", file=out)
+        if times:
+            print(f"TOTAL TIME: {sum(times)} AVG TIME: {sum(times) / len(times)}", file=out)
+        print(file=out)
+
+
+def parse_timeouts(values, engines):
+    timeouts = dict(DEFAULT_TIMEOUTS)
+    for value in values or []:
+        if "=" in value:
+            engine, seconds = value.split("=", 1)
+            if engine not in ENGINES:
+                raise SystemExit(f"Unknown engine: {engine}")
+            timeouts[engine] = float(seconds)
+        else:
+            for engine in engines:
+                timeouts[engine] = float(value)
+    return timeouts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the satisfiability engines.")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="suite to run (default: all)")
+    parser.add_argument("--engine", action="append", choices=sorted(ENGINES), help="engine to run (default: all)")
+    parser.add_argument("--timeout", action="append",
+                        help="seconds per run, for every engine or for one with ENGINE=SECONDS")
+    parser.add_argument("--repeat", type=int, default=1, help="runs of each engine on each instance")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the instance generators")
+    parser.add_argument("--output", help="file for the JSON report (default: standard output)")
+    parser.add_argument("--legacy", action="store_true", help="write the text report of benchmark_result.txt")
+    args = parser.parse_args()
+
+    if args.legacy:
+        legacy_report(seed=args.seed)
+        return
+
+    engines = args.engine or list(ENGINES)
+    report = benchmark(args.suite or list(SUITES), engines, parse_timeouts(args.timeout, engines),
+                       args.repeat, args.seed, log=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
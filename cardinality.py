@@ -0,0 +1,153 @@
+"""Cardinality constraints over integer (DIMACS) literals: at most, at least or exactly k of a list of literals
+are true.
+
+Written with one clause for each set of k + 1 literals, "at most k of n" takes C(n, k + 1) clauses, which is
+already quadratic for k = 1. The encodings below add auxiliary variables to keep the size linear in n:
+
+- "sequential": the sequential counter of Sinz (2005), which counts the true literals from left to right
+  up to k. O(n * k) clauses and auxiliary variables.
+- "totalizer": the totalizer of Bailleux and Boufkhad (2003), a tree of unary adders whose counts are cut
+  at k + 1. O(n * k) auxiliary variables and O(n * k²) clauses, but the counts also serve "at least".
+- "commander": the commander encoding of Klieber and Kwon (2007) for at most one, which groups the
+  literals three by three and constrains one commander variable per group recursively. O(n) clauses.
+- "pairwise": the clauses for every set of k + 1 literals, without auxiliary variables.
+
+At most one of up to 5 literals is always written pairwise, which is not larger than any of the encodings.
+"At least k" is written as "at most n - k" of the negated literals, and "exactly k" as both constraints.
+
+encoder = CardinalityEncoder(total_atoms=4)  # the variables 1 to 4 are taken, auxiliary ones start at 5
+clauses = encoder.exactly([1, 2, 3, 4], 2)
+"""
+
+
+from itertools import combinations
+
+
+ENCODINGS = ("sequential", "totalizer", "commander", "pairwise")
+
+
+class CardinalityEncoder:
+    def __init__(self, total_atoms=0, encoding="sequential"):
+        """
+        'total_atoms' is the largest variable already in use, and 'encoding' the default encoding of the constraints.
+        """
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown cardinality encoding: {encoding}")
+        self.total_atoms = total_atoms
+        self.encoding = encoding
+
+    def new_var(self):
+        self.total_atoms += 1
+        return self.total_atoms
+
+    def at_most(self, literals, k, encoding=None):
+        """
+        Returns the clauses that allow at most 'k' of the 'literals' to be true.
+        """
+        encoding = encoding or self.encoding
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown cardinality encoding: {encoding}")
+
+        literals = list(literals)
+        if k < 0:
+            return [[]]
+        if k >= len(literals):
+            return []
+        if k == 0:
+            return [[-literal] for literal in literals]
+
+        if encoding == "pairwise" or (k == 1 and len(literals) <= 5):
+            return [[-literal for literal in subset] for subset in combinations(literals, k + 1)]
+        if encoding == "sequential":
+            return self.sequential_counter(literals, k)
+        if encoding == "totalizer":
+            clauses = []
+            outputs = self.totalizer(literals, k, clauses)
+            clauses.append([-outputs[k]])
+            return clauses
+        if k > 1:
+            raise ValueError("The commander encoding only supports at most one")
+        return self.commander(literals)
+
+    def at_least(self, literals, k, encoding=None):
+        """
+        Returns the clauses that force at least 'k' of the 'literals' to be true.
+        """
+        literals = list(literals)
+        if k <= 0:
+            return []
+        if k == 1:
+            return [literals]
+        return self.at_most([-literal for literal in literals], len(literals) - k, encoding)
+
+    def exactly(self, literals, k, encoding=None):
+        """
+        Returns the clauses that force exactly 'k' of the 'literals' to be true.
+        """
+        literals = list(literals)
+        return self.at_most(literals, k, encoding) + self.at_least(literals, k, encoding)
+
+    def sequential_counter(self, literals, k):
+        """
+        At most 'k' of 'literals', with 1 <= k < len(literals). The auxiliary variable s[i][j] is true when
+        at least j + 1 of the first i + 1 literals are true.
+        """
+        n = len(literals)
+        s = [[self.new_var() for _ in range(k)] for _ in range(n - 1)]
+        clauses = [[-literals[0], s[0][0]]]
+        clauses.extend([-s[0][j]] for j in range(1, k))
+        for i in range(1, n - 1):
+            clauses.append([-literals[i], s[i][0]])
+            clauses.append([-s[i - 1][0], s[i][0]])
+            for j in range(1, k):
+                clauses.append([-literals[i], -s[i - 1][j - 1], s[i][j]])
+                clauses.append([-s[i - 1][j], s[i][j]])
+            clauses.append([-literals[i], -s[i - 1][k - 1]])
+        clauses.append([-literals[n - 1], -s[n - 2][k - 1]])
+        return clauses
+
+    def totalizer(self, literals, k, clauses):
+        """
+        Builds the tree of unary adders over 'literals', writing its clauses to 'clauses'.
+        Return the outputs of the root: the j-th one (from 0) is true when at least j + 1 literals are true,
+        counting up to k + 1.
+        """
+        if len(literals) == 1:
+            return [literals[0]]
+
+        half = len(literals) // 2
+        left = self.totalizer(literals[:half], k, clauses)
+        right = self.totalizer(literals[half:], k, clauses)
+        outputs = [self.new_var() for _ in range(min(len(left) + len(right), k + 1))]
+        for i in range(len(left) + 1):
+            for j in range(len(right) + 1):
+                if i + j == 0 or i + j > len(outputs):
+                    continue  # past the cut, the clause is implied by the ones for i + j == k + 1
+                clause = [outputs[i + j - 1]]
+                if i:
+                    clause.append(-left[i - 1])
+                if j:
+                    clause.append(-right[j - 1])
+                clauses.append(clause)
+        return outputs
+
+    def commander(self, literals):
+        """
+        At most one of 'literals'. Each group of three literals gets a commander variable implied by all of
+        them, and the commanders are constrained in the same way until only a few are left.
+        """
+        clauses = []
+        while len(literals) > 4:
+            commanders = []
+            for start in range(0, len(literals), 3):
+                group = literals[start:start + 3]
+                if len(group) == 1:
+                    commanders.append(group[0])
+                    continue
+                clauses.extend([-a, -b] for a, b in combinations(group, 2))
+                commander = self.new_var()
+                clauses.extend([-literal, commander] for literal in group)
+                commanders.append(commander)
+            literals = commanders
+        clauses.extend([-a, -b] for a, b in combinations(literals, 2))
+        return clauses
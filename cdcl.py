@@ -0,0 +1,328 @@
+"""Conflict-driven clause learning (CDCL) SAT solver.
+
+The solver works on the same integer (DIMACS) clauses used by semantics.dpll, for example
+[[1, -2], [2, 3], [-1, -3]], and runs iteratively over an explicit trail, so the size of the
+instance is not bounded by Python's recursion limit.
+
+solver = CDCLSolver([[1, -2], [2, 3], [-1, -3]])
+if solver.solve():
+    print(solver.model())
+
+The solver is incremental: clauses can be added between calls to solve(), and solve() accepts assumptions,
+literals that hold only during that call. Learned clauses are kept from one call to the next, so a series
+of related queries over the same clauses is much cheaper than solving each one from scratch.
+
+solver.add_clause([1, 3])
+solver.solve(assumptions=[-3])  # False
+solver.get_core()  # [-3]: the assumptions that made the clauses unsatisfiable
+solver.stats.as_dict()  # {'decisions': 2, 'propagations': 5, 'conflicts': 1, ...}, see stats.py
+
+The search restarts following a restart policy (see restarts.py), and the learned clauses are reduced
+periodically: the first time after 'reduce_base' conflicts, then after 'reduce_increment' more conflicts each
+time, the worse half of the learned clauses is deleted, ranked by literal block distance (LBD, the number of
+decision levels in the clause) and then by how recently they took part in conflicts. Clauses with an LBD of
+at most 2 ("glue" clauses) and the reasons of current assignments are kept, so the memory used stays bounded
+on long runs.
+"""
+
+
+from heuristics import make_heuristic
+from propagation import Propagator
+from restarts import make_restart_policy
+
+
+GLUE_LBD = 2
+
+
+class CDCLSolver(Propagator):
+    def __init__(self, clauses=(), stats=None, heuristic="evsids", restarts="glucose", reduce_base=2000,
+                 reduce_increment=300):
+        """
+        'heuristic' chooses the decisions: "evsids" (the default), "vsids", "static" or a BranchingHeuristic,
+        see heuristics.py. 'restarts' is the restart policy: "glucose" (the default), "luby", "geometric",
+        "none" or a RestartPolicy, see restarts.py.
+        """
+        self.assumptions = []
+        self.core = []
+        self.lbd = []  # LBD of each clause, None for the clauses that were not learned
+        self.clause_activity = []
+        self.clause_increment = 1.0
+        self.restart_policy = make_restart_policy(restarts)
+        self.reduce_interval = reduce_base
+        self.reduce_increment = reduce_increment
+        self.next_reduce = reduce_base
+        super().__init__((), stats)
+        make_heuristic(heuristic).attach(self)
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def new_var(self):
+        var = super().new_var()
+        if self.heuristic is not None:
+            self.heuristic.new_var(var)
+        return var
+
+    def attach(self, literals, lbd=None):
+        self.lbd.append(lbd)
+        self.clause_activity.append(0.0)
+        return super().attach(literals)
+
+    def add_clause(self, clause):
+        """
+        Adds a clause, which may be done between calls to solve(): the assignments of the last call are undone first.
+        Return False if the clause set became trivially unsatisfiable.
+        """
+        self.backtrack(0)
+        return super().add_clause(clause)
+
+    def analyze(self, conflict):
+        """
+        Derives the first unique implication point (1-UIP) clause from the conflict.
+        Return the learned clause, with the asserting literal in the first position, and the level to backjump to.
+        """
+        levels = self.levels
+        bump = self.heuristic.bump
+        lbd = self.lbd
+        current_level = self.decision_level()
+        seen = set()
+        learned = [0]
+        counter = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        reason = conflict
+
+        while True:
+            if lbd[reason] is not None:
+                self.bump_clause(reason)
+            for q in clause:
+                var = abs(q)
+                if q == literal or var in seen or levels[var] == 0:
+                    continue
+                seen.add(var)
+                bump(var)
+                if levels[var] == current_level:
+                    counter += 1
+                else:
+                    learned.append(q)
+
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            seen.discard(abs(literal))
+            counter -= 1
+            if counter == 0:
+                break
+            reason = self.reasons[abs(literal)]
+            clause = self.clauses[reason]
+
+        learned[0] = -literal
+        learned = self.minimize(learned, seen)
+
+        if len(learned) == 1:
+            return learned, 0
+
+        highest = 1
+        for i in range(2, len(learned)):
+            if levels[abs(learned[i])] > levels[abs(learned[highest])]:
+                highest = i
+        learned[1], learned[highest] = learned[highest], learned[1]
+        return learned, levels[abs(learned[1])]
+
+    def bump_clause(self, index):
+        activity = self.clause_activity
+        activity[index] += self.clause_increment
+        if activity[index] > 1e20:
+            for i in range(len(activity)):
+                activity[i] *= 1e-20
+            self.clause_increment *= 1e-20
+
+    def reduce_db(self):
+        """
+        Deletes the worse half of the learned clauses that are not glue clauses nor reasons of current
+        assignments, ranked by LBD and activity. The remaining clauses are renumbered.
+        """
+        lbd = self.lbd
+        activity = self.clause_activity
+        locked = {self.reasons[abs(literal)] for literal in self.trail}
+        candidates = [i for i in range(len(self.clauses))
+                      if lbd[i] is not None and lbd[i] > GLUE_LBD and i not in locked]
+        candidates.sort(key=lambda i: (-lbd[i], activity[i]))
+        deleted = set(candidates[:len(candidates) // 2])
+        if not deleted:
+            return
+
+        renumber = {}
+        clauses, lbds, activities = [], [], []
+        for i, clause in enumerate(self.clauses):
+            if i not in deleted:
+                renumber[i] = len(clauses)
+                clauses.append(clause)
+                lbds.append(lbd[i])
+                activities.append(activity[i])
+        self.clauses, self.lbd, self.clause_activity = clauses, lbds, activities
+
+        for literal in self.trail:
+            var = abs(literal)
+            if self.reasons[var] is not None:
+                self.reasons[var] = renumber[self.reasons[var]]
+        for literal in self.watches:
+            self.watches[literal] = []
+            self.occurrences[literal] = []
+        for index, clause in enumerate(clauses):
+            self.watches[clause[0]].append(index)
+            self.watches[clause[1]].append(index)
+            for literal in clause:
+                self.occurrences[literal].append(index)
+        self.stats.deleted += len(deleted)
+
+    def minimize(self, learned, seen):
+        """
+        Removes the literals of the learned clause that are implied by the other literals in the clause.
+        """
+        result = [learned[0]]
+        for literal in learned[1:]:
+            reason = self.reasons[abs(literal)]
+            if reason is None:
+                result.append(literal)
+                continue
+            for q in self.clauses[reason]:
+                var = abs(q)
+                if q != -literal and var not in seen and self.levels[var] > 0:
+                    result.append(literal)
+                    break
+        return result
+
+    def analyze_final(self, literal):
+        """
+        Finds the assumptions that imply the negation of the assumption 'literal', which is false.
+        Return them, with 'literal', as the unsatisfiable core.
+        """
+        core = [literal]
+        if self.decision_level() == 0:
+            return core
+
+        seen = {abs(literal)}
+        for i in range(len(self.trail) - 1, self.trail_lim[0] - 1, -1):
+            var = abs(self.trail[i])
+            if var not in seen:
+                continue
+            reason = self.reasons[var]
+            if reason is None:
+                core.append(self.trail[i])
+            else:
+                for q in self.clauses[reason]:
+                    if self.levels[abs(q)] > 0:
+                        seen.add(abs(q))
+        return core
+
+    def set_phases(self, literals):
+        """
+        Makes the solver try the polarity of each literal first when deciding its variable, for example to
+        start the search from a known good assignment, like the method of the same name in PySAT.
+        """
+        self.heuristic.set_phases(literals)
+
+    def solve(self, assumptions=()):
+        """
+        Return True if the clauses are satisfiable together with the 'assumptions', a list of literals that
+        must be true in this call only, and False otherwise.
+        The satisfying valuation can be read with model(), and when the result is False because of the
+        assumptions, get_core() tells which of them are responsible.
+        """
+        self.core = []
+        if not self.ok:
+            return False
+
+        self.backtrack(0)
+        self.assumptions = list(assumptions)
+        for literal in self.assumptions:
+            while abs(literal) > self.num_vars:
+                self.new_var()
+            self.used_vars.add(abs(literal))
+        self.heuristic.reset()
+
+        with self.stats.phase("solve"):
+            return self.search()
+
+    def search(self):
+        """
+        The search loop of solve(), from decision level 0 with the assumptions already set.
+        """
+        stats = self.stats
+        restart = False
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                stats.conflicts += 1
+                stats.tick()
+                if self.decision_level() == 0:
+                    self.ok = False
+                    return False
+
+                learned, level = self.analyze(conflict)
+                lbd = len({self.levels[abs(literal)] for literal in learned})
+                self.heuristic.decay()
+                self.clause_increment /= 0.999
+                self.backtrack(level)
+                stats.learned += 1
+                if len(learned) == 1:
+                    self.enqueue(learned[0], None)
+                else:
+                    self.enqueue(learned[0], self.attach(learned, lbd))
+                restart = self.restart_policy.conflict(lbd) or restart
+                if stats.conflicts >= self.next_reduce:
+                    self.reduce_interval += self.reduce_increment
+                    self.next_reduce = stats.conflicts + self.reduce_interval
+                    self.reduce_db()
+                continue
+
+            if restart:
+                restart = False
+                stats.restarts += 1
+                self.restart_policy.restarted()
+                self.backtrack(0)
+                continue
+
+            literal = None
+            while self.decision_level() < len(self.assumptions):
+                assumption = self.assumptions[self.decision_level()]
+                value = self.value(assumption)
+                if value == 1:
+                    self.new_decision_level()  # already true: an empty level keeps levels and assumptions aligned
+                elif value == -1:
+                    self.core = self.analyze_final(assumption)
+                    return False
+                else:
+                    literal = assumption
+                    break
+
+            if literal is None:
+                literal = self.heuristic.pick()
+                if literal is None:
+                    return True
+            stats.decisions += 1
+            stats.tick()
+            self.new_decision_level()
+            self.enqueue(literal, None)
+
+    def model(self):
+        """
+        Return the valuation found by the last call to solve() as a dictionary, for example {1: True, 2: False}.
+        """
+        return self.valuation()
+
+    def get_model(self):
+        """
+        Return the valuation found by the last call to solve() as a list of literals, for example [1, -2],
+        like the solvers of PySAT.
+        """
+        return [var if value else -var for var, value in self.valuation().items()]
+
+    def get_core(self):
+        """
+        Return the assumptions responsible for the last call to solve() returning False, for example [-3, 1].
+        It's empty if the clauses are unsatisfiable without any assumption.
+        """
+        return self.core
@@ -1,73 +1,285 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+from itertools import compress, count
+from operator import not_, sub
 from formula import Atom, Not
+from stats import SolverStats
 
 
 class CNFDimacsParser:
-    def __init__(self):
+    """
+    Reads CNF files in the DIMACS format.
+
+    The file is read in chunks of 'chunk_size' bytes, so it is never held in memory as a whole, and
+    clauses may span several lines or share a line: only the 0 terminates a clause. Comment lines
+    ('c ...') are skipped, the problem line ('p cnf <atoms> <clauses>') sets total_atoms and
+    total_clauses, and a line starting with '%' ends the clauses, as in the SATLIB benchmark files.
+
+    parser = CNFDimacsParser()
+    for clause in parser.iter_clauses("uf50-01.cnf"):  # [-5, 26, 48], [15, -4, 28], ...
+        ...
+    literals, offsets = parser.parse_flat("uf50-01.cnf")  # flat array('i') buffers
+    """
+    def __init__(self, chunk_size=1 << 20):
         self.total_atoms = 0
         self.total_clauses = 0
+        self.chunk_size = chunk_size
 
-    def parse(self, path_to_file):
-        with open(path_to_file) as f:
-            self.__contents = f.readlines()
-
-        cnf_clauses = []
-        result = []
-        for i, line in enumerate(self.__contents):
-            if line.startswith("c"):
-                continue
-
-            if line.startswith("p"):
-                total_atoms_n_clauses = line.strip().split(" ")[2:]
-                self.total_atoms = int(total_atoms_n_clauses[0])
-                self.total_clauses = int(total_atoms_n_clauses[2])
-
-                cnf_clauses = self.__contents[i + 1: self.total_clauses]
-                break
-
-        for clause in cnf_clauses:
-            clause = clause.strip()
-            atoms = []
-            for atom in clause.split(' '):
-                atom = int(atom)
-                if atom == 0:
-                    break
-                elif atom < 0:
-                    atoms.append(atom * -1)
+    def read_header(self, line):
+        fields = line.split()
+        if len(fields) != 4 or fields[1] != b"cnf":
+            raise ValueError(f"Invalid DIMACS problem line: {line.decode(errors='replace')!r}")
+        self.total_atoms = int(fields[2])
+        self.total_clauses = int(fields[3])
+
+    def iter_literals(self, path_to_file):
+        """
+        Yields lists with the integers of the clause section of the file, one list per chunk read,
+        including the 0's that terminate the clauses.
+        """
+        with open(path_to_file, "rb") as f:
+            rest = b""
+            finished = False
+            while not finished:
+                chunk = f.read(self.chunk_size)
+                if chunk:
+                    text = rest + chunk
+                    cut = text.rfind(b"\n") + 1  # the last line may continue in the next chunk
+                    text, rest = text[:cut], text[cut:]
                 else:
-                    atoms.append(atom)
-            result.append(atoms)
-        return result
+                    text = rest
+                    finished = True
 
-    def to_cnf_dimacs(self, cnf_formula, literal_lookup):
-        # atomic_lookup = {}
-        atomics = set()
-        result = []
+                if b"c" in text or b"p" in text or b"%" in text:
+                    body = []
+                    for line in text.split(b"\n"):
+                        line = line.strip()
+                        if not line or line.startswith(b"c"):
+                            continue
+                        if line.startswith(b"p"):
+                            self.read_header(line)
+                            continue
+                        if line.startswith(b"%"):
+                            finished = True
+                            break
+                        body.append(line)
+                    text = b" ".join(body)
 
-        if not literal_lookup:
+                literals = list(map(int, text.split()))
+                if literals:
+                    yield literals
+
+    def iter_clauses(self, path_to_file):
+        """
+        Yields the clauses of the file one at a time, as lists of integers. A last clause missing its 0 is
+        yielded too.
+        """
+        clause = []
+        for literals in self.iter_literals(path_to_file):
+            for literal in literals:
+                if literal == 0:
+                    yield clause
+                    clause = []
+                else:
+                    clause.append(literal)
+        if clause:
+            yield clause
+
+    def parse_flat(self, path_to_file):
+        """
+        Returns the clauses of the file as two flat arrays, 'literals' (array('i')) and 'offsets' (array('q')),
+        where the k-th clause is literals[offsets[k]:offsets[k + 1]]. This takes a few bytes per literal
+        instead of a Python list per clause.
+        """
+        literals = array("i")
+        offsets = array("q", [0])
+        for chunk in self.iter_literals(path_to_file):
+            # the clause ending at the k-th 0 of the chunk, at position p, ends at len(literals) + p - k
+            zeros = compress(count(), map(not_, chunk))
+            offsets.extend(map(sub, zeros, count(-len(literals))))
+            literals.extend(filter(None, chunk))
+        if offsets[-1] != len(literals):
+            offsets.append(len(literals))
+        return literals, offsets
+
+    def parse(self, path_to_file):
+        """
+        Returns the clauses of the file as a list of lists of integers, for example [[-5, 26, 48], [15, -4, 28]].
+        """
+        return list(self.iter_clauses(path_to_file))
+
+    def to_cnf_dimacs(self, cnf_formula, literal_lookup, stats=None):
+        """
+        Converts clauses of literals, as returned by semantics.cnf_clausal, to integer clauses.
+        'literal_lookup' maps the literals already numbered to their integers, Atom -> n and Not(Atom) -> -n;
+        the atoms not found in it are numbered after the ones it has and added to it.
+        The time spent is added to the "dimacs" phase of 'stats', a SolverStats, when one is given.
+        """
+        if stats is None:
+            stats = SolverStats()
+        with stats.phase("dimacs"):
+            total_atoms = max((abs(value) for value in literal_lookup.values()), default=0)
+            result = []
             for clause in cnf_formula:
+                integers = []
                 for literal in clause:
-                    atomics.add(literal)
-
-            for i, literal in enumerate(atomics):
-                i += 1
-                if isinstance(literal, Not):
-                    if literal.inner in literal_lookup:
-                        literal_lookup[literal] = -literal_lookup[literal.inner]
-                    else:
-                        literal_lookup[literal] = -i
-                else:
-                    if Not(literal) in literal_lookup:
-                        literal_lookup[literal] = literal_lookup[Not(literal)] * -1
-                    else:
-                        literal_lookup[literal] = i
+                    if literal not in literal_lookup:
+                        atom = literal.inner if isinstance(literal, Not) else literal
+                        total_atoms += 1
+                        literal_lookup[atom] = total_atoms
+                        literal_lookup[Not(atom)] = -total_atoms
+                    integers.append(literal_lookup[literal])
+                result.append(integers)
+
+        self.total_atoms = total_atoms
+        self.total_clauses = len(result)
+
+        return result
+
+
+def lookup_names(literal_lookup):
+    """
+    Returns the name table {n: name} of a literal_lookup {Atom: n, Not(Atom): -n}.
+    """
+    return {value: literal.name for literal, value in literal_lookup.items() if isinstance(literal, Atom)}
+
+
+def flatten(clauses):
+    """
+    Returns the clauses as the flat arrays used by CNFDimacsParser.parse_flat, (literals, offsets).
+    """
+    literals = array("i")
+    offsets = array("q", [0])
+    for clause in clauses:
+        literals.extend(clause)
+        offsets.append(len(literals))
+    return literals, offsets
+
+
+def write_dimacs(path_to_file, clauses, total_atoms=None, names=None):
+    """
+    Writes the clauses (a list of lists of integers) to a file in the DIMACS format, which can be given
+    to external solvers. 'total_atoms' is computed from the clauses when it's not given, and the name table
+    'names' ({n: name}), if given, is written in comment lines such as 'c 3 Grafos_1'.
+    """
+    if total_atoms is None:
+        total_atoms = max((abs(literal) for clause in clauses for literal in clause), default=0)
+
+    with open(path_to_file, "w", encoding="utf-8") as f:
+        if names:
+            f.writelines(f"c {var} {name}\n" for var, name in sorted(names.items()))
+        f.write(f"p cnf {total_atoms} {len(clauses)}\n")
+        lines = []
+        for clause in clauses:
+            lines.append(" ".join(map(str, clause)))
+            if len(lines) == 4096:
+                f.write(" 0\n".join(lines) + " 0\n")
+                lines.clear()
+        if lines:
+            f.write(" 0\n".join(lines) + " 0\n")
+
+
+# Binary clause cache: a header followed by the literals (int32), the offsets (int64), aligned to 8 bytes,
+# and the name table as JSON. Every number is little-endian.
+CACHE_MAGIC = b"CNFC"
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct("<4sIqqqq")  # magic, version, total atoms, literals, clauses, size of the names
+
+
+def save_clause_cache(path_to_file, literals, offsets, total_atoms=None, names=None):
+    """
+    Writes flat clauses (see flatten and CNFDimacsParser.parse_flat) and their name table {n: name} to a
+    binary file that ClauseCache loads without parsing or copying.
+    """
+    if not isinstance(literals, array) or literals.typecode != "i":
+        literals = array("i", literals)
+    if not isinstance(offsets, array) or offsets.typecode != "q":
+        offsets = array("q", offsets)
+    if total_atoms is None:
+        total_atoms = max(map(abs, literals), default=0)
+    if sys.byteorder != "little":
+        literals, offsets = array("i", literals), array("q", offsets)
+        literals.byteswap()
+        offsets.byteswap()
+
+    names_data = json.dumps(sorted((names or {}).items())).encode("utf-8")
+    literals_data = literals.tobytes()
+    with open(path_to_file, "wb") as f:
+        f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, total_atoms, len(literals), len(offsets) - 1,
+                                  len(names_data)))
+        f.write(literals_data)
+        f.write(bytes(-len(literals_data) % 8))
+        f.write(offsets.tobytes())
+        f.write(names_data)
+
+
+class ClauseCache:
+    """
+    A clause file written by save_clause_cache, mapped into memory. 'literals' and 'offsets' are
+    memoryviews over the mapped file, so loading takes the same time whatever the size of the instance,
+    and the pages are only read when used. The k-th clause is literals[offsets[k]:offsets[k + 1]].
+
+    with ClauseCache("instance.cnfc") as cache:
+        solver = CDCLSolver(cache)
+        ...
+    """
+    def __init__(self, path_to_file):
+        with open(path_to_file, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.total_atoms, total_literals, self.total_clauses, names_size = \
+            CACHE_HEADER.unpack_from(self.mmap, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            self.mmap.close()
+            raise ValueError(f"{path_to_file} is not a clause cache file")
+
+        self.__view = memoryview(self.mmap)
+        position = CACHE_HEADER.size
+        end = position + 4 * total_literals
+        self.literals = self.__view[position:end].cast("i")
+        position = end + (-end % 8)
+        end = position + 8 * (self.total_clauses + 1)
+        self.offsets = self.__view[position:end].cast("q")
+        self.names = {var: name for var, name in json.loads(bytes(self.__view[end:end + names_size]).decode("utf-8"))}
+
+        if sys.byteorder != "little":
+            self.literals, self.offsets = array("i", self.literals), array("q", self.offsets)
+            self.literals.byteswap()
+            self.offsets.byteswap()
+
+    def __len__(self):
+        return self.total_clauses
+
+    def clause(self, k):
+        return self.literals[self.offsets[k]:self.offsets[k + 1]].tolist()
+
+    def __iter__(self):
+        literals = self.literals
+        offsets = self.offsets
+        for k in range(self.total_clauses):
+            yield literals[offsets[k]:offsets[k + 1]].tolist()
+
+    def literal_lookup(self):
+        """
+        Returns the literal_lookup {Atom: n, Not(Atom): -n} of the name table.
+        """
+        lookup = {}
+        for var, name in self.names.items():
+            lookup[Atom(name)] = var
+            lookup[Not(Atom(name))] = -var
+        return lookup
 
-        for clause in cnf_formula:
-            atomics = []
-            for literal in clause:
-                atomics.append(literal_lookup[literal])
-            result.append(atomics)
+    def close(self):
+        for view in (self.literals, self.offsets, self.__view):
+            if isinstance(view, memoryview):
+                view.release()
+        self.mmap.close()
 
-        self.total_atoms = len(atomics)
-        self.total_clauses = len(clause)
+    def __enter__(self):
+        return self
 
-        return result
\ No newline at end of file
+    def __exit__(self, *exc_info):
+        self.close()
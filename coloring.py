@@ -0,0 +1,132 @@
+"""Graph colouring heuristics for the course conflict graph.
+
+Scheduling courses in k periods so that conflicting courses get different periods is colouring the conflict
+graph with k colours, so a good colouring often answers the question before any clause is written.
+Graphs are given as adjacency lists, where neighbors[v] lists the vertices adjacent to v, and colours are
+numbered from 0.
+
+neighbors = [[1, 2], [0, 2], [0, 1], []]  # a triangle and an isolated vertex
+dsatur(neighbors)  # [0, 1, 2, 0]
+greedy_clique(neighbors)  # [0, 1, 2]: no colouring with fewer than 3 colours exists
+exact_coloring(neighbors, 2)  # False
+"""
+
+
+import heapq
+
+
+def dsatur(neighbors):
+    """
+    Colours the graph with the DSATUR heuristic of Brélaz (1979): the next vertex is always the one whose
+    neighbors already have the most distinct colours (its saturation), ties broken by degree, and it gets the
+    smallest colour none of them has.
+    Return the colour of each vertex.
+    """
+    n = len(neighbors)
+    colors = [-1] * n
+    neighbor_colors = [set() for _ in range(n)]
+    heap = [(0, -len(neighbors[v]), v) for v in range(n)]
+    heapq.heapify(heap)
+
+    while heap:
+        _, _, v = heapq.heappop(heap)
+        if colors[v] != -1:
+            continue  # an outdated entry, the vertex was already coloured
+
+        color = 0
+        while color in neighbor_colors[v]:
+            color += 1
+        colors[v] = color
+
+        for u in neighbors[v]:
+            if colors[u] == -1 and color not in neighbor_colors[u]:
+                neighbor_colors[u].add(color)
+                heapq.heappush(heap, (-len(neighbor_colors[u]), -len(neighbors[u]), u))
+    return colors
+
+
+def greedy_clique(neighbors, tries=10):
+    """
+    Finds a clique by starting from each of the 'tries' vertices with the highest degrees and adding, while
+    possible, the candidate adjacent to every vertex already in the clique that has the highest degree.
+    Every colouring needs at least as many colours as the size of any clique.
+    Return the vertices of the largest clique found.
+    """
+    adjacent = [set(vertices) for vertices in neighbors]
+    order = sorted(range(len(neighbors)), key=lambda v: len(neighbors[v]), reverse=True)
+
+    best = []
+    for start in order[:tries]:
+        clique = [start]
+        candidates = set(adjacent[start])
+        while candidates:
+            v = max(candidates, key=lambda u: len(neighbors[u]))
+            clique.append(v)
+            candidates &= adjacent[v]
+        if len(clique) > len(best):
+            best = clique
+    return best
+
+
+def exact_coloring(neighbors, max_colors, node_limit=10000):
+    """
+    Searches for a colouring with at most 'max_colors' colours by branch and bound, branching on the vertex
+    chosen by DSATUR and trying each colour it can take, where only one of the colours not used yet is tried
+    because they are interchangeable. The search is iterative and stops after 'node_limit' assignments.
+    Return the colouring, False if there is none with 'max_colors' colours, or None if the limit was reached.
+    """
+    n = len(neighbors)
+    colors = [-1] * n
+    # how many neighbors of each vertex have each colour
+    counts = [[0] * max_colors for _ in range(n)]
+    saturation = [0] * n
+    uses = [0] * max_colors  # how many vertices have each colour
+
+    def assign(v, color):
+        colors[v] = color
+        uses[color] += 1
+        for u in neighbors[v]:
+            if counts[u][color] == 0:
+                saturation[u] += 1
+            counts[u][color] += 1
+
+    def unassign(v):
+        color = colors[v]
+        colors[v] = -1
+        uses[color] -= 1
+        for u in neighbors[v]:
+            counts[u][color] -= 1
+            if counts[u][color] == 0:
+                saturation[u] -= 1
+
+    stack = []  # [vertex, colours to try, index of the next one]
+    nodes = 0
+    while True:
+        uncolored = [v for v in range(n) if colors[v] == -1]
+        if not uncolored:
+            return colors
+
+        v = max(uncolored, key=lambda u: (saturation[u], len(neighbors[u])))
+        options = []
+        for color in range(max_colors):
+            if counts[v][color] == 0:
+                options.append(color)
+                if uses[color] == 0:
+                    break  # the other unused colours would only give symmetric colourings
+        stack.append([v, options, 0])
+
+        while stack:
+            entry = stack[-1]
+            vertex, options, index = entry
+            if colors[vertex] != -1:
+                unassign(vertex)
+            if index < len(options):
+                nodes += 1
+                if nodes > node_limit:
+                    return None
+                entry[2] += 1
+                assign(vertex, options[index])
+                break
+            stack.pop()
+        else:
+            return False
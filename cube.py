@@ -0,0 +1,330 @@
+"""Cube and conquer: a lookahead splits one large instance into many cubes, solved independently.
+
+A cube is a list of assumption literals. lookahead_cubes picks, at each node, the variable whose two values
+propagate the most literals, splits on it, and stops when there are 'max_cubes' cubes; the cubes together
+cover every assignment that was not refuted by propagation on the way, so the clauses are satisfiable
+exactly when they are satisfiable under some cube. Each process of solve_cubes keeps one incremental
+CDCLSolver and solves its cubes as assumptions, keeping what it learns from one cube to the next.
+
+cubes = lookahead_cubes(clauses, max_cubes=64)  # [[12, -7, 3], [12, -7, -3], ...]
+solve_cubes(clauses, cubes)  # a valuation such as {1: True, 2: False, ...}, or False
+
+To share the cubes between machines, a work queue is a directory with the clauses in problem.icnf (the
+incremental DIMACS format, where each line 'a <literals> 0' is a cube) and one file per cube in pending/.
+A worker claims a cube by moving its file to claimed/ (an atomic rename, so two workers never take the same
+cube), solves it and writes the answer to results/. A cube left in claimed/ by a worker that died can be
+moved back to pending/.
+
+python cube.py split instance.cnf queue --cubes 256
+python cube.py work queue  # on any number of machines sharing the directory
+python cube.py collect queue
+"""
+
+
+import argparse
+import multiprocessing
+import os
+from collections import deque
+
+from cdcl import CDCLSolver
+from cnf_dimacs import CNFDimacsParser
+from propagation import Propagator
+
+
+def lookahead(propagator, candidates):
+    """
+    Tries both values of the 'candidates' unassigned variables that occur in the most clauses, propagating
+    each one and counting the literals it assigns.
+    Return ("refuted", None) if both values of a variable conflict, ("forced", literal) if only the negation
+    of 'literal' conflicts, ("split", variable) with the variable of the best score, or (None, None) if every
+    variable is assigned.
+    """
+    free = [var for var in range(1, propagator.num_vars + 1)
+            if propagator.assigns[var] == 0 and var in propagator.used_vars]
+    if not free:
+        return None, None
+    free.sort(key=lambda var: len(propagator.occurrences[var]) + len(propagator.occurrences[-var]), reverse=True)
+
+    best, best_score = None, -1
+    level = propagator.decision_level()
+    for var in free[:candidates]:
+        counts = []
+        for literal in (var, -var):
+            before = len(propagator.trail)
+            propagator.new_decision_level()
+            propagator.enqueue(literal, None)
+            conflict = propagator.propagate()
+            counts.append(None if conflict is not None else len(propagator.trail) - before)
+            propagator.backtrack(level)
+
+        if counts[0] is None and counts[1] is None:
+            return "refuted", None
+        if counts[0] is None:
+            return "forced", -var
+        if counts[1] is None:
+            return "forced", var
+
+        # the product favours variables that reduce the instance on both sides, as in the march solvers
+        score = counts[0] * counts[1] + counts[0] + counts[1]
+        if score > best_score:
+            best, best_score = var, score
+    return "split", best
+
+
+def assign_cube(propagator, cube):
+    """
+    Backtracks to level 0 and assigns the literals of the cube, one decision level each, propagating them.
+    Return False if the cube conflicts with the clauses.
+    """
+    propagator.backtrack(0)
+    for literal in cube:
+        value = propagator.value(literal)
+        if value == -1:
+            return False
+        if value == 1:
+            continue
+        propagator.new_decision_level()
+        propagator.enqueue(literal, None)
+        if propagator.propagate() is not None:
+            return False
+    return True
+
+
+def lookahead_cubes(clauses, max_cubes=64, candidates=20):
+    """
+    Splits the clauses into at most 'max_cubes' cubes, breadth first, with lookahead on 'candidates'
+    variables at each node. Cubes refuted by propagation are dropped, so an empty list means the clauses are
+    unsatisfiable.
+    """
+    propagator = Propagator(clauses)
+    if not propagator.ok or propagator.propagate() is not None:
+        return []
+
+    cubes = []
+    frontier = deque([[]])
+    while frontier:
+        if len(cubes) + len(frontier) >= max_cubes:
+            break
+        cube = frontier.popleft()
+        while True:
+            if not assign_cube(propagator, cube):
+                outcome = "refuted"
+                break
+            outcome, literal = lookahead(propagator, candidates)
+            if outcome != "forced":
+                break
+            cube = cube + [literal]
+
+        if outcome == "split":
+            frontier.append(cube + [literal])
+            frontier.append(cube + [-literal])
+        elif outcome is None:
+            cubes.append(cube)  # every variable assigned without conflict: the cube is a model
+    cubes.extend(frontier)
+    return cubes
+
+
+def solve_cube(solver, cube):
+    """
+    Solves the clauses of 'solver', a CDCLSolver, under the cube.
+    Return the valuation, or False if there is none that satisfies the cube.
+    """
+    if not solver.solve(cube):
+        return False
+    return solver.model()
+
+
+def cube_worker(clauses, tasks, results):
+    try:
+        solver = CDCLSolver(clauses)
+        while True:
+            cube = tasks.get()
+            if cube is None:
+                return
+            results.put((solve_cube(solver, cube), None))
+    except Exception as error:
+        results.put((None, repr(error)))
+
+
+def solve_cubes(clauses, cubes, max_workers=None):
+    """
+    Solves the clauses under each cube in 'max_workers' processes (as many as the number of CPUs by default),
+    which take the cubes from a shared queue. At the first satisfiable cube the other processes are terminated.
+    Return its valuation, or False if the clauses are unsatisfiable under every cube.
+    """
+    if not cubes:
+        return False
+    if max_workers == 1 or len(cubes) == 1:
+        solver = CDCLSolver(clauses)
+        for cube in cubes:
+            valuation = solve_cube(solver, cube)
+            if valuation is not False:
+                return valuation
+        return False
+
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    # daemons, so they are terminated when this process exits, even if it never reaches the finally below
+    processes = [multiprocessing.Process(target=cube_worker, args=(clauses, tasks, results), daemon=True)
+                 for _ in range(min(max_workers or multiprocessing.cpu_count(), len(cubes)))]
+    for cube in cubes:
+        tasks.put(cube)
+    for process in processes:
+        tasks.put(None)
+        process.start()
+
+    try:
+        for _ in cubes:
+            valuation, error = results.get()
+            if error is not None:
+                raise RuntimeError(f"A cube worker failed: {error}")
+            if valuation is not False:
+                return valuation
+        return False
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+
+def write_icnf(path_to_file, clauses, cubes=()):
+    """
+    Writes the clauses and the cubes in the incremental DIMACS (iCNF) format.
+    """
+    with open(path_to_file, "w") as f:
+        f.write("p inccnf\n")
+        for clause in clauses:
+            f.write(" ".join(map(str, clause)) + " 0\n")
+        for cube in cubes:
+            f.write("a " + " ".join(map(str, cube)) + " 0\n")
+
+
+def read_icnf(path_to_file):
+    """
+    Reads a file written by write_icnf.
+    Return the clauses and the cubes.
+    """
+    clauses, cubes = [], []
+    clause = []
+    with open(path_to_file) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line[0] in "cp":
+                continue
+            if line[0] == "a":
+                cubes.append([int(token) for token in line[1:].split()][:-1])
+                continue
+            for token in line.split():
+                literal = int(token)
+                if literal == 0:
+                    clauses.append(clause)
+                    clause = []
+                else:
+                    clause.append(literal)
+    return clauses, cubes
+
+
+def create_work_queue(directory, clauses, cubes):
+    """
+    Creates a work queue in 'directory' with one pending file per cube.
+    """
+    for name in ("pending", "claimed", "results"):
+        os.makedirs(os.path.join(directory, name), exist_ok=True)
+    write_icnf(os.path.join(directory, "problem.icnf"), clauses)
+    for i, cube in enumerate(cubes):
+        write_icnf(os.path.join(directory, "pending", f"{i:06d}.icnf"), [], [cube])
+
+
+def claim_cube(directory):
+    """
+    Moves a pending cube to claimed/.
+    Return the name of its file, or None if there's no pending cube.
+    """
+    for name in sorted(os.listdir(os.path.join(directory, "pending"))):
+        try:
+            os.rename(os.path.join(directory, "pending", name), os.path.join(directory, "claimed", name))
+        except FileNotFoundError:
+            continue  # another worker claimed it first
+        return name
+    return None
+
+
+def work(directory):
+    """
+    Solves pending cubes of the work queue until there's none left or a model was found.
+    Return the number of cubes solved.
+    """
+    solver = CDCLSolver(read_icnf(os.path.join(directory, "problem.icnf"))[0])
+    model_path = os.path.join(directory, "model")
+    solved = 0
+    while not os.path.exists(model_path):
+        name = claim_cube(directory)
+        if name is None:
+            break
+        claimed = os.path.join(directory, "claimed", name)
+        cube = read_icnf(claimed)[1][0]
+
+        if solver.solve(cube):
+            answer = "s SATISFIABLE\nv " + " ".join(map(str, solver.get_model())) + " 0\n"
+        else:
+            answer = "s UNSATISFIABLE\n"
+        result = os.path.join(directory, "results", name)
+        with open(result + ".tmp", "w") as f:
+            f.write(answer)
+        os.replace(result + ".tmp", result)
+        if answer.startswith("s SAT"):
+            with open(model_path + ".tmp", "w") as f:
+                f.write(answer)
+            os.replace(model_path + ".tmp", model_path)
+        os.remove(claimed)
+        solved += 1
+    return solved
+
+
+def collect(directory):
+    """
+    Return the valuation found by the workers, False if every cube was solved without one, or None if some
+    cube is not solved yet.
+    """
+    model_path = os.path.join(directory, "model")
+    if os.path.exists(model_path):
+        with open(model_path) as f:
+            literals = [int(token) for token in f.read().split("v", 1)[1].split()][:-1]
+        return {abs(literal): literal > 0 for literal in literals}
+    if os.listdir(os.path.join(directory, "pending")) or os.listdir(os.path.join(directory, "claimed")):
+        return None
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cube and conquer over a work queue directory.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    split = commands.add_parser("split", help="split a DIMACS file into the cubes of a new work queue")
+    split.add_argument("cnf")
+    split.add_argument("directory")
+    split.add_argument("--cubes", type=int, default=64, help="maximum number of cubes")
+    commands.add_parser("work", help="solve pending cubes").add_argument("directory")
+    commands.add_parser("collect", help="print the answer, if there's one").add_argument("directory")
+    args = parser.parse_args()
+
+    if args.command == "split":
+        clauses = CNFDimacsParser().parse(args.cnf)
+        cubes = lookahead_cubes(clauses, args.cubes)
+        create_work_queue(args.directory, clauses, cubes)
+        print(f"{len(cubes)} cubes")
+    elif args.command == "work":
+        print(f"{work(args.directory)} cubes solved")
+    else:
+        result = collect(args.directory)
+        if result is None:
+            print("UNKNOWN")
+        elif result is False:
+            print("UNSATISFIABLE")
+        else:
+            print("SATISFIABLE")
+            print(" ".join(str(var if value else -var) for var, value in sorted(result.items())))
+
+
+if __name__ == "__main__":
+    main()
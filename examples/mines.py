@@ -1,6 +1,5 @@
-from semantics import *
-from typing import List
-from typing import Union
+from cardinality import CardinalityEncoder
+from cdcl import CDCLSolver
 
 """Campo Minado é um jogo em que o objetivo é limpar uma grade sem detonar nenhuma mina.
 O jogador é apresentado inicialmente com uma grade de quadrados indiferenciados.
@@ -49,6 +48,20 @@ my_grid = [[-1, -1, -1, -1],
 
 # atom 0_0 denotes that there is a mine in square (0,0)
 # atom 0_1 denotes that there is a mine in square (0,1)
+# the premises are written as clauses in integer form, where the atom i_j is the variable cell_variable(grid, i, j)
+
+def cell_variable(grid, i, j):
+    return i * len(grid[0]) + j + 1
+
+
+def cell_name(grid, variable):
+    if variable > len(grid) * len(grid[0]):
+        return 'aux' + str(variable)  # auxiliary variable of a cardinality constraint
+    return str((variable - 1) // len(grid[0])) + '_' + str((variable - 1) % len(grid[0]))
+
+
+def clause_to_str(grid, clause):
+    return ' ∨ '.join(('¬' if literal < 0 else '') + cell_name(grid, abs(literal)) for literal in clause)
 
 
 # there is no mine in squares with number different from -1:
@@ -58,81 +71,52 @@ def no_mines(grid):
     for i in range(len(grid)):
         for j in range(len(grid[i])):
             if grid[i][j] != -1:
-                premises = premises + [Not(Atom(str(i) + '_' + str(j)))]
+                premises.append([-cell_variable(grid, i, j)])
     return premises
 
 
-# if a square (i, j) has number k, there is exactly k mines adjacent to (i, j):
+# if a square (i, j) has number k, there is exactly k mines adjacent to (i, j).
+# with one clause for each group of neighbors "exactly k" takes dozens of clauses for k = 2 or 3, so the
+# cardinality encodings are used instead:
 
-def mines_neighborhood(grid):
+def mines_neighborhood(grid, cardinality):
     premises = []
     for i in range(len(grid)):
         for j in range(len(grid[i])):
-            if grid[i][j] == 1:
-                premises = premises + at_least_one(i, j)
-                premises = premises + at_most_one(i, j)
-            if grid[i][j] == 2:
-                pass
-                # ======== YOUR CODE HERE ========
-            if grid[i][j] == 3:
-                pass
-                # ======== YOUR CODE HERE ========
-
+            if grid[i][j] != -1:
+                neighbors = [cell_variable(grid, a, b) for a, b in get_adjacent_cells(grid, i, j) if (a, b) != (i, j)]
+                premises = premises + cardinality.exactly(neighbors, grid[i][j])
     return premises
 
 
-# at most one mine is adjacent to (i, j):
+def get_adjacent_cells(grid, i, j):
+    adjacent_cells = [(i + k, j + m) for k in [-1, 0, 1] for m in [-1, 0, 1]
+                      if 0 <= i + k < len(grid) and 0 <= j + m < len(grid[0])]
+    return adjacent_cells
+
 
-def at_most_one(i, j):
-    neighbors = get_adjacent_cells(i, j)
-    neighbors.remove((i, j))
-    neighbors.sort()
-    formulas = []
-    for neighbor1 in neighbors:
-        for neighbor2 in neighbors:
-            if neighbor1 < neighbor2:
-                formulas = formulas + [Not(And(Atom(str(neighbor1[0]) + '_' + str(neighbor1[1])),
-                                               Atom(str(neighbor2[0]) + '_' + str(neighbor2[1]))))]
-    return formulas
+cardinality = CardinalityEncoder(total_atoms=len(my_grid) * len(my_grid[0]))
+premises = no_mines(my_grid) + mines_neighborhood(my_grid, cardinality)
 
+print('premises in no_mines(my_grid): ')
+for premise in no_mines(my_grid):
+    print(clause_to_str(my_grid, premise))
 
-# at least one mine is adjacent to (i, j):
+print('premises in mines_neighborhood(my_grid) ')
+for premise in premises[len(no_mines(my_grid)):]:
+    print(clause_to_str(my_grid, premise))
 
-def at_least_one(i, j):  # -> List[Formula]
-    neighbors = get_adjacent_cells(i, j)
-    neighbors.remove((i, j))
-    neighbors.sort()
-    atoms = []
-    for neighbor in neighbors:
-        atoms.append(Atom(str(neighbor[0]) + '_' + str(neighbor[1])))
-    final_formula = atoms[0]
-    for atom in atoms:
-        if atom != atoms[0]:
-            final_formula = Or(atom, final_formula)
-    return [final_formula]
 
+# the premises are given once to an incremental solver; each question is then answered by one call to
+# solve() assuming the negation of the conclusion, which also reuses the clauses learned by the previous calls.
+solver = CDCLSolver(premises)
 
-def get_adjacent_cells(i, j):
-    adjacent_cells = [(i + k, j + m) for k in [-1, 0, 1] for m in [-1, 0, 1] if 0 <= i + k <= 3 and 0 <= j + m <= 3]
-    return adjacent_cells
 
+def is_consequence(literal):
+    """Returns True if the literal (for example -cell_variable(my_grid, 1, 2)) follows from the premises."""
+    return not solver.solve(assumptions=[-literal])
 
-# print(get_adjacent_cells(0, 0))
-print('premises in no_mines(my_grid): ')
-for premise in no_mines(my_grid):
-    print(premise)
 
-print('premises in mines_neighborhood(my_grid) ')
-for premise in mines_neighborhood(my_grid):
-    print(premise)
-
-
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Atom('1_2')))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Not(Atom('1_2'))))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Atom('1_3')))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Not(Atom('1_3'))))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Atom('2_0')))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Not(Atom('2_0'))))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Atom('3_0')))
-print(is_logical_consequence(no_mines(my_grid) + mines_neighborhood(my_grid), Not(Atom('3_0'))))
-# ======== YOUR CODE HERE ========
+for i, j in [(1, 2), (1, 3), (2, 0), (3, 0)]:
+    print(is_consequence(cell_variable(my_grid, i, j)))
+    print(is_consequence(-cell_variable(my_grid, i, j)))
@@ -10,19 +10,48 @@ formula2 = Implies(Atom('p'), Or(Atom('p'), Atom('s')))
 """
 
 
+from weakref import WeakValueDictionary
+
+
 class Formula:
-    def __init__(self):
-        pass
+    """
+    Formulas are immutable and hash-consed: creating a formula that is structurally equal to one that
+    already exists returns the existing object. So equality is identity, hashing is O(1) (the identity
+    hash, computed from the address of the node), and repeated subformulas are shared instead of copied.
+    Compound nodes are looked up by the identities of their children, which are interned too, and nodes
+    no longer referenced anywhere else are dropped from the table of interned formulas.
+    """
+    __slots__ = ('__weakref__',)
+    _interned = WeakValueDictionary()
+
+    @classmethod
+    def _intern(cls, key, *fields):
+        node = Formula._interned.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            for name, value in zip(cls.__slots__, fields):
+                object.__setattr__(node, name, value)
+            Formula._interned[key] = node
+        return node
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} objects are immutable")
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, name) for name in type(self).__slots__)
 
 
 class Atom(Formula):
     """
     This class represents propositional logic variables.
     """
+    __slots__ = ('name',)
 
-    def __init__(self, name):
-        super().__init__()
-        self.name = name
+    def __new__(cls, name):
+        return cls._intern((cls, name), name)
 
     def __str__(self):
         return str(self.name)
@@ -30,19 +59,12 @@ class Atom(Formula):
     def __repr__(self):
         return f"Atom(name={self.name})"
 
-    def __eq__(self, other):
-        return isinstance(other, Atom) and other.name == self.name
-
-    def __hash__(self):
-        return hash((self.name, 'atom'))
-
 
 class Implies(Formula):
+    __slots__ = ('left', 'right')
 
-    def __init__(self, left, right):
-        super().__init__()
-        self.left = left
-        self.right = right
+    def __new__(cls, left, right):
+        return cls._intern((cls, id(left), id(right)), left, right)
 
     def __str__(self):
         return "(" + self.left.__str__() + " " + u"\u2192" + " " + self.right.__str__() + ")"
@@ -50,18 +72,12 @@ class Implies(Formula):
     def __repr__(self):
         return str(self)
 
-    def __eq__(self, other):
-        return isinstance(other, Implies) and other.left == self.left and other.right == self.right
-
-    def __hash__(self):
-        return hash((hash(self.left), hash(self.right), 'implies'))
-
 
 class Not(Formula):
+    __slots__ = ('inner',)
 
-    def __init__(self, inner):
-        super().__init__()
-        self.inner = inner
+    def __new__(cls, inner):
+        return cls._intern((cls, id(inner)), inner)
 
     def __str__(self):
         return "(" + u"\u00ac" + str(self.inner) + ")"
@@ -69,51 +85,64 @@ class Not(Formula):
     def __repr__(self):
         return str(self)
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and other.inner == self.inner
 
-    def __hash__(self):
-        return hash((hash(self.inner), 'not'))
-
-
-class And(Formula):
-
-    def __init__(self, left, right):
-        super().__init__()
-        self.left = left
-        self.right = right
-
-    def __str__(self):
-        return "(" + self.left.__str__() + " " + u"\u2227" + " " + self.right.__str__() + ")"
+class AssociativeFormula(Formula):
+    """
+    Base class of the n-ary connectives And and Or. The operands are kept flat in a tuple: nested
+    operands of the same connective are spliced in on construction, so And(And(p, q), r), And(p, And(q, r))
+    and And(p, q, r) are the same node, and a long conjunction built one operand at a time does not become
+    a chain as deep as the number of operands. Creating the connective with a single operand returns
+    that operand.
+
+    'left' and 'right' are kept for backward compatibility and read the node as the left-nested binary chain
+    And(And(p, q), r): 'right' is the last operand and 'left' is the connective of the other ones. 'left'
+    builds that connective on each access, so code that walks the formula should use 'operands' instead.
+    """
+    __slots__ = ()
+    symbol = ''
 
-    def __repr__(self):
-        return str(self)
+    def __new__(cls, *operands):
+        flat = []
+        for operand in operands:
+            if type(operand) is cls:
+                flat.extend(operand.operands)
+            else:
+                flat.append(operand)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and other.left == self.left and other.right == self.right
+        if not flat:
+            raise TypeError(f"{cls.__name__} needs at least one operand")
+        if len(flat) == 1:
+            return flat[0]
 
-    def __hash__(self):
-        return hash((hash(self.left), hash(self.right), 'and'))
+        flat = tuple(flat)
+        return cls._intern((cls,) + tuple(map(id, flat)), flat)
 
+    @property
+    def left(self):
+        return type(self)(*self.operands[:-1])
 
-class Or(Formula):
+    @property
+    def right(self):
+        return self.operands[-1]
 
-    def __init__(self, left, right):
-        super().__init__()
-        self.left = left
-        self.right = right
+    def __reduce__(self):
+        return type(self), self.operands
 
     def __str__(self):
-        return "(" + self.left.__str__() + " " + u"\u2228" + " " + self.right.__str__() + ")"
+        return "(" + (" " + self.symbol + " ").join(str(operand) for operand in self.operands) + ")"
 
     def __repr__(self):
         return str(self)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and other.left == self.left and other.right == self.right
 
-    def __hash__(self):
-        return hash((hash(self.left), hash(self.right), 'or'))
+class And(AssociativeFormula):
+    __slots__ = ('operands',)
+    symbol = u"\u2227"
+
+
+class Or(AssociativeFormula):
+    __slots__ = ('operands',)
+    symbol = u"\u2228"
 
 
 class Iff:
@@ -2,18 +2,67 @@
 do some computation on its syntactic structure. """
 
 
-from formula import Not, Atom, Implies, And, Or
+from formula import Not, Atom, Implies, AssociativeFormula
 from itertools import product
 
 
-def length(formula):
-    """Determines the length of a formula in propositional logic."""
+def children(formula):
+    """Returns the immediate subformulas of a formula, in order. Atoms have none."""
     if isinstance(formula, Atom):
-        return 1
+        return ()
     if isinstance(formula, Not):
-        return length(formula.inner) + 1
-    if isinstance(formula, Implies) or isinstance(formula, And) or isinstance(formula, Or):
-        return length(formula.left) + length(formula.right) + 1
+        return (formula.inner,)
+    if isinstance(formula, Implies):
+        return (formula.left, formula.right)
+    if isinstance(formula, AssociativeFormula):
+        return formula.operands
+    raise TypeError(f"Not a formula: {formula!r}")
+
+
+def post_order(formula):
+    """Yields every distinct subformula of a formula once, each one after all of its subformulas.
+
+    Formulas are hash-consed, so a subformula that occurs many times is a single shared node and is
+    visited only once. The traversal uses an explicit stack instead of recursion, so it works on
+    formulas of any depth.
+    """
+    visited = set()
+    stack = [(formula, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            yield node
+            continue
+        if node in visited:
+            continue
+        visited.add(node)
+        stack.append((node, True))
+        for child in reversed(children(node)):
+            if child not in visited:
+                stack.append((child, False))
+
+
+def fold(formula, combine):
+    """Computes a value bottom-up over a formula without recursion.
+
+    'combine' receives a node and the list with the values already computed for its children, and returns
+    the value of the node. Each distinct subformula is combined only once. For example, the depth of a
+    formula is fold(formula, lambda node, values: 1 + max(values, default=0)).
+    """
+    values = {}
+    for node in post_order(formula):
+        values[node] = combine(node, [values[child] for child in children(node)])
+    return values[formula]
+
+
+def length(formula):
+    """Determines the length of a formula in propositional logic."""
+    def combine(node, values):
+        if not values:
+            return 1
+        # an n-ary And or Or counts as the n - 1 binary connectives it stands for
+        return sum(values) + max(len(values) - 1, 1)
+    return fold(formula, combine)
 
 
 def subformulas(formula):
@@ -28,15 +77,7 @@ def subformulas(formula):
     This piece of code prints p, s, (p v s), (p → (p v s))
     (Note that there is no repetition of p)
     """
-
-    if isinstance(formula, Atom):
-        return {formula}
-    if isinstance(formula, Not):
-        return {formula}.union(subformulas(formula.inner))
-    if isinstance(formula, Implies) or isinstance(formula, And) or isinstance(formula, Or):
-        sub1 = subformulas(formula.left)
-        sub2 = subformulas(formula.right)
-        return {formula}.union(sub1).union(sub2)
+    return set(post_order(formula))
 
 #  we have shown in class that, for all formula A, len(subformulas(A)) <= length(A).
 
@@ -53,57 +94,33 @@ def atoms(formula):
     This piece of code above prints: p, s
     (Note that there is no repetition of p)
     """
-    if isinstance(formula, Atom):
-        return {formula}
-
-    if isinstance(formula, Not):
-        return atoms(formula.inner)
-
-    if isinstance(formula, (Implies, And, Or)):
-        return atoms(formula.left).union(atoms(formula.right))
+    return {node for node in post_order(formula) if isinstance(node, Atom)}
 
 
 def number_of_atoms(formula):
     """Returns the number of distinct atoms occurring in a formula."""
-    if isinstance(formula, Atom):
-        return 1
-
-    if isinstance(formula, Not):
-        return number_of_atoms(formula.inner)
-
-    if isinstance(formula, (Implies, And, Or)):
-        return number_of_atoms(formula.right) + number_of_atoms(formula.left)
+    return fold(formula, lambda node, values: sum(values) if values else 1)
 
 
 def number_of_connectives(formula):
     """Returns the number of connectives occurring in a formula."""
-    if isinstance(formula, Atom):
-        return 0
-
-    if isinstance(formula, Not):
-        return 1 + number_of_connectives(formula.inner)
-
-    if isinstance(formula, (Implies, And, Or)):
-        return 1 + number_of_connectives(formula.right) + number_of_connectives(formula.left)
+    def combine(node, values):
+        if not values:
+            return 0
+        return sum(values) + max(len(values) - 1, 1)
+    return fold(formula, combine)
 
 
 def substitution(formula, old_subformula, new_subformula):
     """Returns a new formula obtained by replacing all occurrences
     of old_subformula in the input formula by new_subformula."""
-    if formula == old_subformula:
-        return new_subformula
-
-    if isinstance(formula, Atom):
-        return formula
-
-    if isinstance(formula, Not):
-        formula.inner = substitution(formula.inner, old_subformula, new_subformula)
-        return formula
-
-    if isinstance(formula, (Implies, And, Or)):
-        formula.left = substitution(formula.left, old_subformula, new_subformula)
-        formula.right = substitution(formula.right, old_subformula, new_subformula)
-        return formula
+    def combine(node, values):
+        if node == old_subformula:
+            return new_subformula
+        if all(value is child for value, child in zip(values, children(node))):
+            return node  # nothing was replaced below this node
+        return type(node)(*values)
+    return fold(formula, combine)
 
 
 def valuations(atomics):
@@ -0,0 +1,277 @@
+"""Branching heuristics for the solvers built on propagation.Propagator (semantics.dpll and CDCLSolver).
+
+A heuristic chooses the next decision literal. It is attached to a propagator, which tells it about every
+variable that loses its value on backtrack, and the solvers tell it which variables took part in each
+conflict:
+
+- "static": a fixed order, by the number of clauses each variable occurs in, starting with the polarity
+  that occurs the most.
+- "vsids": the Variable State Independent Decaying Sum of Chaff (2001). Each variable has an activity,
+  increased by 1 when it takes part in a conflict and halved every 'interval' conflicts, and the next
+  decision is the unassigned variable with the highest activity.
+- "evsids": the exponential VSIDS of MiniSat, where the increment grows by 1 / decay after each conflict
+  instead, so recent conflicts weigh more without rescaling every activity.
+
+Both VSIDS versions keep the unassigned variables in a heap ordered by activity, so a decision costs
+O(log n), and use phase saving: a variable is decided with the value it had when it was last unassigned.
+
+heuristic = make_heuristic("evsids")
+dpll(clauses, heuristic=heuristic)
+CDCLSolver(clauses, heuristic="static")
+"""
+
+
+class ActivityHeap:
+    """
+    Binary max-heap of variables ordered by 'activity' (a list indexed by variable), that knows the position
+    of each variable so it can be moved up when its activity increases.
+    """
+    def __init__(self, activity):
+        self.activity = activity
+        self.heap = []
+        self.indices = [-1]  # position of each variable in the heap, -1 when it is not there
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, var):
+        return var < len(self.indices) and self.indices[var] >= 0
+
+    def push(self, var):
+        while var >= len(self.indices):
+            self.indices.append(-1)
+        if self.indices[var] >= 0:
+            return
+        self.indices[var] = len(self.heap)
+        self.heap.append(var)
+        self.sift_up(self.indices[var])
+
+    def pop(self):
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        self.indices[top] = -1
+        if heap:
+            heap[0] = last
+            self.indices[last] = 0
+            self.sift_down(0)
+        return top
+
+    def increased(self, var):
+        """Restores the order after the activity of 'var' increased."""
+        if var in self:
+            self.sift_up(self.indices[var])
+
+    def sift_up(self, i):
+        heap, indices, activity = self.heap, self.indices, self.activity
+        var = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if activity[heap[parent]] >= activity[var]:
+                break
+            heap[i] = heap[parent]
+            indices[heap[i]] = i
+            i = parent
+        heap[i] = var
+        indices[var] = i
+
+    def sift_down(self, i):
+        heap, indices, activity = self.heap, self.indices, self.activity
+        var = heap[i]
+        size = len(heap)
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and activity[heap[child + 1]] > activity[heap[child]]:
+                child += 1
+            if activity[heap[child]] <= activity[var]:
+                break
+            heap[i] = heap[child]
+            indices[heap[i]] = i
+            i = child
+        heap[i] = var
+        indices[var] = i
+
+
+class BranchingHeuristic:
+    """
+    Base class of the heuristics. attach() is called once with the propagator, new_var() for every variable,
+    reset() at the start of each solve, bump() for each variable of a conflict followed by one call to
+    decay(), unassigned() for each literal undone by backtrack, and pick() to get the next decision.
+    """
+    def __init__(self):
+        self.propagator = None
+        self.preferred_phases = {}
+
+    def attach(self, propagator):
+        self.propagator = propagator
+        propagator.heuristic = self
+        for var in range(1, propagator.num_vars + 1):
+            self.new_var(var)
+
+    def new_var(self, var):
+        pass
+
+    def reset(self):
+        pass
+
+    def bump(self, var):
+        pass
+
+    def decay(self):
+        pass
+
+    def unassigned(self, literal):
+        pass
+
+    def pick(self):
+        """Return the next decision literal, or None if every variable is assigned."""
+        raise NotImplementedError
+
+    def set_phases(self, literals):
+        """Makes the heuristic try the polarity of each literal first when deciding its variable."""
+        for literal in literals:
+            self.preferred_phases[abs(literal)] = literal > 0
+
+    def occurrence_phase(self, var):
+        occurrences = self.propagator.occurrences
+        return self.preferred_phases.get(var, len(occurrences[var]) >= len(occurrences[-var]))
+
+
+class StaticOrder(BranchingHeuristic):
+    def __init__(self):
+        super().__init__()
+        self.order = []
+        self.order_pos = [0]
+        self.phase = [False]
+        self.next_order = 0
+
+    def new_var(self, var):
+        self.order_pos.append(len(self.order))
+        self.order.append(var)
+        self.phase.append(False)
+
+    def reset(self):
+        """
+        Orders the variables by the number of clauses they occur in, and starts each one with the polarity
+        that occurs the most, unless another one was given with set_phases.
+        """
+        occurrences = self.propagator.occurrences
+        self.order.sort(key=lambda var: len(occurrences[var]) + len(occurrences[-var]), reverse=True)
+        for i, var in enumerate(self.order):
+            self.order_pos[var] = i
+            self.phase[var] = self.occurrence_phase(var)
+        self.next_order = 0
+
+    def unassigned(self, literal):
+        var = abs(literal)
+        if self.order_pos[var] < self.next_order:
+            self.next_order = self.order_pos[var]
+
+    def pick(self):
+        assigns = self.propagator.assigns
+        while self.next_order < len(self.order):
+            var = self.order[self.next_order]
+            if assigns[var] == 0:
+                return var if self.phase[var] else -var
+            self.next_order += 1
+        return None
+
+
+class VSIDS(BranchingHeuristic):
+    def __init__(self, decay=0.95, exponential=True, interval=256, phase_saving=True):
+        """
+        With 'exponential' the increment is divided by 'decay' after each conflict (EVSIDS), otherwise every
+        activity is halved every 'interval' conflicts (the original VSIDS). 'phase_saving' makes each
+        variable keep the value it had before it was unassigned.
+        """
+        super().__init__()
+        self.decay_factor = decay
+        self.exponential = exponential
+        self.interval = interval
+        self.phase_saving = phase_saving
+        self.activity = [0.0]
+        self.increment = 1.0
+        self.conflicts = 0
+        self.phase = [None]  # saved polarity of each variable, None until it is first unassigned
+        self.heap = ActivityHeap(self.activity)
+
+    def new_var(self, var):
+        self.activity.append(0.0)
+        self.phase.append(None)
+        self.heap.push(var)
+
+    def reset(self):
+        """
+        Puts every unassigned variable back in the heap. Variables that were never bumped start with an
+        activity below 1 proportional to the number of clauses they occur in, so the first decisions follow
+        the same order as "static".
+        """
+        propagator = self.propagator
+        occurrences = propagator.occurrences
+        most = max((len(occurrences[var]) + len(occurrences[-var]) for var in range(1, propagator.num_vars + 1)),
+                   default=0)
+        for var in range(1, propagator.num_vars + 1):
+            if self.activity[var] == 0.0 and most:
+                self.activity[var] = (len(occurrences[var]) + len(occurrences[-var])) / (most + 1)
+                self.heap.increased(var)
+            if propagator.assigns[var] == 0:
+                self.heap.push(var)
+
+    def bump(self, var):
+        activity = self.activity
+        activity[var] += self.increment
+        if activity[var] > 1e100:
+            for i in range(1, len(activity)):
+                activity[i] *= 1e-100
+            self.increment *= 1e-100
+        self.heap.increased(var)
+
+    def decay(self):
+        self.conflicts += 1
+        if self.exponential:
+            self.increment /= self.decay_factor
+        elif self.conflicts % self.interval == 0:
+            # halving every activity keeps their order, so the heap stays valid
+            for i in range(1, len(self.activity)):
+                self.activity[i] *= 0.5
+
+    def unassigned(self, literal):
+        var = abs(literal)
+        if self.phase_saving:
+            self.phase[var] = literal > 0
+        self.heap.push(var)
+
+    def pick(self):
+        assigns = self.propagator.assigns
+        heap = self.heap
+        while heap:
+            var = heap.pop()
+            if assigns[var] == 0:
+                if var in self.preferred_phases:
+                    phase = self.preferred_phases[var]
+                elif self.phase[var] is not None:
+                    phase = self.phase[var]
+                else:
+                    phase = self.occurrence_phase(var)
+                return var if phase else -var
+        return None
+
+
+HEURISTICS = ("static", "vsids", "evsids")
+
+
+def make_heuristic(heuristic):
+    """
+    Return 'heuristic' if it's already a BranchingHeuristic, or a new one of the kind named by it.
+    """
+    if isinstance(heuristic, BranchingHeuristic):
+        return heuristic
+    if heuristic == "static":
+        return StaticOrder()
+    if heuristic == "vsids":
+        return VSIDS(exponential=False)
+    if heuristic == "evsids":
+        return VSIDS()
+    raise ValueError(f"Unknown branching heuristic: {heuristic}")
@@ -2,44 +2,47 @@ import time
 
 from pysat.solvers import Glucose3
 
-from semantics import cnf, cnf_clausal
-from cnf_dimacs import CNFDimacsParser
-from alocacao import (multiline_input, parse_input,
-                      period_restriction_for_all_semesters_formula,
-                      professor_restriction_formula)
+from alocacao import courses_to_clauses, minimum_periods, multiline_input, parse_input
+from stats import SolverStats
 
 
 def main():
     try:
-        qtd_periods = int(input("Digite a quantidade de horários: "))
+        qtd_periods = int(input("Digite a quantidade de horários (0 para encontrar a menor quantidade possível): "))
+        if qtd_periods < 0:
+            raise ValueError
     except ValueError:
         print("ERROR: Precisa ser um número inteiro positivo.")
         exit(1)
 
     courses_list = parse_input(multiline_input("INPUT: "))
 
-    parser = CNFDimacsParser()
-    literal_lookup = {}
+    if qtd_periods == 0:
+        start = time.time()
+        qtd_periods, schedule = minimum_periods(courses_list, Glucose3())
+        end = time.time()
 
-    period_restriction = period_restriction_for_all_semesters_formula(courses_list, qtd_periods)
-    professor_restriction = professor_restriction_formula(courses_list, qtd_periods)
+        print("\nPySat OUTPUT:")
+        print(f"Menor quantidade de horários: {qtd_periods}")
+        for name, period in schedule.items():
+            print(f"{name}_{period}")
+        print(f"\nPySat MINIMUM PERIODS TOTAL TIME: {end - start}")
+        return
 
-    cnf_clauses = []
-    for formula in period_restriction:
-        cnf_clauses.extend(cnf_clausal(cnf(formula)))
-
-    period_restriction_cnf = parser.to_cnf_dimacs(cnf_clauses, literal_lookup)
-
-    for formula in professor_restriction.values():
-        period_restriction_cnf.extend( parser.to_cnf_dimacs(cnf_clausal(cnf(formula)), literal_lookup))
+    stats = SolverStats()
+    period_restriction_cnf, atom_names = courses_to_clauses(courses_list, qtd_periods, stats=stats)
 
     glucose = Glucose3()
     glucose.append_formula(period_restriction_cnf)
 
     start = time.time()
     print("PySat OUTPUT:")
-    if glucose.solve():
-        print(glucose.get_model())
+    with stats.phase("solve"):
+        satisfiable = glucose.solve()
+    if satisfiable:
+        for literal in glucose.get_model():
+            if literal > 0:
+                print(atom_names[literal])
     else:
         print(("Não foi possivel alocar horários para os cursos com os dados fornercidos!"
                " Tente aumentar o número de horários."))
@@ -47,6 +50,7 @@ def main():
     end = time.time()
 
     print(f"PySat GLUCOSE3 TOTAL TIME: {end - start}")
+    print(f"PySat PHASE TIMES: {stats.times}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+"""Portfolio solving: several differently configured solvers race on the same clauses in separate processes.
+
+The time a solver takes on a hard instance depends a lot on its heuristics and on the order of the clauses,
+so a run that would take minutes is often a few seconds away with another configuration. The portfolio
+starts one process per configuration, takes the first answer and stops the others, which puts every core
+to work on a single instance.
+
+A configuration is a dictionary with:
+- "solver": "cdcl" or "dpll";
+- "heuristic": the branching heuristic, "evsids" (the default), "vsids" or "static", see heuristics.py;
+- "restarts": for cdcl, the restart policy, "glucose" (the default), "luby", "geometric" or "none", see
+  restarts.py;
+- "seed": when given, the variables are renamed and the clauses shuffled with this seed before solving,
+  which changes how the heuristics break ties;
+- "phase": for cdcl, the polarity tried first for every variable: "occurrence" (the default, the polarity
+  that occurs the most), True, False or "random".
+
+valuation, configuration = solve_portfolio([[1, -2], [2, 3], [-1, -3]])
+# {1: True, 2: True, 3: False}, {'solver': 'cdcl'}: the valuation and the configuration that found it
+"""
+
+
+import multiprocessing
+import queue
+import random
+import time
+
+from cdcl import CDCLSolver
+from semantics import dpll
+
+
+SOLVERS = ("cdcl", "dpll")
+
+CONFIGURATIONS = [
+    {"solver": "cdcl"},
+    {"solver": "cdcl", "heuristic": "vsids", "restarts": "luby", "seed": 1},
+    {"solver": "cdcl", "heuristic": "static", "restarts": "geometric", "phase": False, "seed": 2},
+    {"solver": "dpll"},
+    {"solver": "cdcl", "restarts": "luby", "phase": True, "seed": 3},
+    {"solver": "cdcl", "phase": "random", "seed": 4},
+    {"solver": "dpll", "heuristic": "static", "seed": 5},
+    {"solver": "cdcl", "heuristic": "vsids", "restarts": "none", "phase": "random", "seed": 6},
+]
+
+
+def shuffle_clauses(clauses, seed):
+    """
+    Renames the variables with a random permutation and shuffles the clauses and their literals.
+    Return the new clauses and the permutation, where permutation[v] is the new name of the variable v.
+    """
+    rng = random.Random(seed)
+    total_atoms = max((abs(literal) for clause in clauses for literal in clause), default=0)
+    names = list(range(1, total_atoms + 1))
+    rng.shuffle(names)
+    permutation = [0] + names
+
+    shuffled = []
+    for clause in clauses:
+        clause = [permutation[literal] if literal > 0 else -permutation[-literal] for literal in clause]
+        rng.shuffle(clause)
+        shuffled.append(clause)
+    rng.shuffle(shuffled)
+    return shuffled, permutation
+
+
+def run_configuration(clauses, configuration):
+    """
+    Solves the clauses with one configuration of the portfolio.
+    Return a valuation of the original variables, or False if the clauses are unsatisfiable.
+    """
+    solver = configuration.get("solver", "cdcl")
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver: {solver}")
+
+    seed = configuration.get("seed")
+    permutation = None
+    if seed is not None:
+        clauses, permutation = shuffle_clauses(clauses, seed)
+
+    heuristic = configuration.get("heuristic", "evsids")
+    if solver == "dpll":
+        valuation = dpll(clauses, heuristic=heuristic)
+    else:
+        cdcl = CDCLSolver(clauses, heuristic=heuristic, restarts=configuration.get("restarts", "glucose"))
+        phase = configuration.get("phase", "occurrence")
+        if phase == "random":
+            rng = random.Random(seed)
+            cdcl.set_phases([var if rng.random() < 0.5 else -var for var in range(1, cdcl.num_vars + 1)])
+        elif phase in (True, False):
+            cdcl.set_phases([var if phase else -var for var in range(1, cdcl.num_vars + 1)])
+        elif phase != "occurrence":
+            raise ValueError(f"Unknown phase: {phase}")
+        valuation = cdcl.model() if cdcl.solve() else False
+
+    if valuation is False or permutation is None:
+        return valuation
+    return {var: valuation[permutation[var]] for var in range(1, len(permutation)) if permutation[var] in valuation}
+
+
+def portfolio_worker(index, clauses, configuration, results):
+    try:
+        results.put((index, run_configuration(clauses, configuration), None))
+    except Exception as error:
+        results.put((index, None, repr(error)))
+
+
+def solve_portfolio(clauses, configurations=None, timeout=None):
+    """
+    Solves the clauses with every configuration (CONFIGURATIONS by default, as many as the number of CPUs),
+    each one in its own process. The first answer wins and the other processes are terminated.
+    Return the valuation, or False if the clauses are unsatisfiable, and the configuration that answered;
+    or (None, None) if no configuration answered within 'timeout' seconds.
+    """
+    if configurations is None:
+        configurations = CONFIGURATIONS[:max(multiprocessing.cpu_count(), 2)]
+
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=portfolio_worker, args=(i, clauses, configuration, results))
+                 for i, configuration in enumerate(configurations)]
+    for process in processes:
+        process.start()
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    errors = []
+    try:
+        while len(errors) < len(processes):
+            try:
+                index, valuation, error = results.get(
+                    timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                return None, None
+            if error is None:
+                return valuation, configurations[index]
+            errors.append(f"{configurations[index]}: {error}")
+        raise RuntimeError("Every configuration failed: " + "; ".join(errors))
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
@@ -0,0 +1,281 @@
+"""Simplification of integer (DIMACS) clauses before solving.
+
+Preprocessor applies, until nothing changes:
+
+- deduplication: repeated literals, repeated clauses and tautologies are dropped;
+- unit propagation of the unit clauses at the top level;
+- subsumption: a clause that contains another clause is removed;
+- self-subsuming strengthening: when C ∨ l and D ∨ ¬l are clauses and C ⊆ D, ¬l is removed from D ∨ ¬l;
+- failed-literal probing: if propagating l leads to a conflict, ¬l is added as a unit;
+- bounded variable elimination: a variable is replaced by all the resolvents of its clauses when there are
+  no more of them than the clauses removed, as in SatELite (Eén and Biere, 2005).
+
+The variables keep their numbers, so the valuations still map back through a literal_lookup, and
+reconstruct() turns a valuation of the simplified clauses into one of the original clauses, giving values
+to the eliminated and propagated variables.
+
+preprocessor = Preprocessor(clauses)
+simplified = preprocessor.run()
+valuation = cdcl(simplified)
+if valuation is not False:
+    valuation = preprocessor.reconstruct(valuation)
+"""
+
+
+from collections import defaultdict
+
+from propagation import Propagator
+from stats import SolverStats
+
+
+class Preprocessor:
+    def __init__(self, clauses, frozen=(), stats=None, occurrence_limit=16, resolvent_limit=24, probe_limit=200):
+        """
+        'frozen' variables are never eliminated, for example the ones used later as assumptions.
+        A variable is only eliminated when it occurs in at most 'occurrence_limit' clauses and no resolvent
+        has more than 'resolvent_limit' literals, and probing tries the 'probe_limit' variables that occur
+        the most.
+        """
+        self.stats = stats if stats is not None else SolverStats()
+        self.frozen = {abs(literal) for literal in frozen}
+        self.occurrence_limit = occurrence_limit
+        self.resolvent_limit = resolvent_limit
+        self.probe_limit = probe_limit
+
+        self.clauses = []  # frozensets of literals, None for the removed ones
+        self.keys = {}  # clause -> its index, to find duplicates
+        self.occurrences = defaultdict(set)  # literal -> indexes of the clauses where it occurs
+        self.assigned = {}  # variables fixed by units, var -> bool
+        self.units = []
+        self.stack = []  # (literal, clause) of the eliminated variables, for reconstruct
+        self.queue = []  # clauses still to be checked for subsumption
+        self.touched = set()  # variables whose clauses changed since the last elimination pass
+        self.ok = True
+        self.total_atoms = 0
+        self.counts = {"duplicates": 0, "subsumed": 0, "strengthened": 0, "failed": 0, "eliminated": 0}
+
+        for clause in clauses:
+            for literal in clause:
+                self.total_atoms = max(self.total_atoms, abs(literal))
+            self.add(clause)
+
+    def value(self, literal):
+        value = self.assigned.get(abs(literal))
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def add(self, literals):
+        """
+        Adds a clause, dropping it if it's a tautology, a duplicate or already satisfied.
+        """
+        if not self.ok:
+            return
+        clause = set()
+        for literal in literals:
+            value = self.value(literal)
+            if value is True or -literal in clause:
+                return
+            if value is None:
+                clause.add(literal)
+        clause = frozenset(clause)
+
+        if not clause:
+            self.ok = False
+            return
+        if clause in self.keys:
+            self.counts["duplicates"] += 1
+            return
+        if len(clause) == 1:
+            self.units.extend(clause)
+
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.keys[clause] = index
+        for literal in clause:
+            self.occurrences[literal].add(index)
+            self.touched.add(abs(literal))
+        self.queue.append(index)
+
+    def remove(self, index):
+        clause = self.clauses[index]
+        for literal in clause:
+            self.occurrences[literal].discard(index)
+            self.touched.add(abs(literal))
+        del self.keys[clause]
+        self.clauses[index] = None
+
+    def strengthen(self, index, literal):
+        clause = self.clauses[index]
+        self.remove(index)
+        self.counts["strengthened"] += 1
+        self.add(clause - {literal})
+
+    def propagate_units(self):
+        """
+        Assigns the unit clauses, removing the clauses they satisfy and their negation from the others.
+        """
+        while self.units and self.ok:
+            literal = self.units.pop()
+            value = self.value(literal)
+            if value is False:
+                self.ok = False
+                return
+            if value is True:
+                continue
+            self.assigned[abs(literal)] = literal > 0
+            for index in list(self.occurrences[literal]):
+                self.remove(index)
+            for index in list(self.occurrences[-literal]):
+                self.strengthen(index, -literal)
+
+    def subsume(self):
+        """
+        Removes the clauses subsumed by the clauses in the queue and strengthens the ones they self-subsume,
+        until the queue is empty.
+        """
+        while self.queue and self.ok:
+            # shorter clauses first, since they subsume the most; the clauses added meanwhile wait for the next pass
+            batch = sorted((i for i in self.queue if self.clauses[i] is not None), key=lambda i: len(self.clauses[i]))
+            self.queue = []
+            for index in batch:
+                clause = self.clauses[index]
+                if clause is None or not self.ok:
+                    continue
+
+                rarest = min(clause, key=lambda literal: len(self.occurrences[literal]))
+                for other in list(self.occurrences[rarest]):
+                    candidate = self.clauses[other]
+                    if other != index and len(candidate) >= len(clause) and clause <= candidate:
+                        self.remove(other)
+                        self.counts["subsumed"] += 1
+
+                for literal in clause:
+                    rest = clause - {literal}
+                    for other in list(self.occurrences[-literal]):
+                        candidate = self.clauses[other]
+                        if candidate is not None and len(candidate) >= len(clause) and rest <= candidate:
+                            self.strengthen(other, -literal)
+                self.propagate_units()
+
+    def probe(self):
+        """
+        Failed-literal probing on the variables that occur the most.
+        """
+        propagator = Propagator(clause for clause in self.clauses if clause is not None)
+        if not propagator.ok or propagator.propagate() is not None:
+            self.ok = False
+            return
+
+        variables = [var for var in range(1, propagator.num_vars + 1) if propagator.assigns[var] == 0 and
+                     propagator.occurrences[var] and propagator.occurrences[-var]]
+        variables.sort(key=lambda var: len(propagator.occurrences[var]) + len(propagator.occurrences[-var]),
+                       reverse=True)
+        for var in variables[:self.probe_limit]:
+            for literal in (var, -var):
+                if propagator.assigns[var] != 0:
+                    break
+                propagator.new_decision_level()
+                propagator.enqueue(literal, None)
+                conflict = propagator.propagate()
+                propagator.backtrack(0)
+                if conflict is None:
+                    continue
+
+                self.counts["failed"] += 1
+                self.units.append(-literal)
+                propagator.add_clause([-literal])
+                if propagator.propagate() is not None:
+                    self.ok = False
+                    return
+
+        # the literals implied at level 0 are units as well
+        self.units.extend(literal for literal in propagator.trail if self.value(literal) is None)
+        self.propagate_units()
+
+    def eliminate(self):
+        """
+        Bounded variable elimination, from the variables with the fewest resolvents, trying only the
+        variables whose clauses changed since the last call.
+        Return the number of variables eliminated.
+        """
+        occurrences = self.occurrences
+        candidates = [var for var in self.touched
+                      if var not in self.frozen and var not in self.assigned and
+                      0 < len(occurrences[var]) + len(occurrences[-var]) <= self.occurrence_limit]
+        self.touched = set()
+        candidates.sort(key=lambda var: len(occurrences[var]) * len(occurrences[-var]))
+
+        eliminated = 0
+        for var in candidates:
+            if not self.ok:
+                break
+            positive = [self.clauses[i] for i in occurrences[var]]
+            negative = [self.clauses[i] for i in occurrences[-var]]
+            removed = len(positive) + len(negative)
+            if var in self.assigned or removed == 0 or removed > self.occurrence_limit:
+                continue
+
+            resolvents = []
+            bounded = True
+            negative = [(n - {-var}, {-literal for literal in n}) for n in negative]
+            for p in positive:
+                p = p - {var}
+                for n, complement in negative:
+                    if not p.isdisjoint(complement):
+                        continue  # tautology
+                    resolvent = p | n
+                    if len(resolvent) > self.resolvent_limit or len(resolvents) == removed:
+                        bounded = False
+                        break
+                    resolvents.append(resolvent)
+                if not bounded:
+                    break
+            if not bounded:
+                continue
+
+            for index in list(occurrences[var]) + list(occurrences[-var]):
+                self.stack.append((var if var in self.clauses[index] else -var, self.clauses[index]))
+                self.remove(index)
+            for resolvent in resolvents:
+                self.add(resolvent)
+            self.propagate_units()
+            eliminated += 1
+        self.counts["eliminated"] += eliminated
+        return eliminated
+
+    def run(self, rounds=5):
+        """
+        Simplifies the clauses: units, subsumption and probing once, then subsumption and elimination
+        alternate for at most 'rounds' rounds, while variables are still eliminated.
+        Return the simplified clauses, [[]] if they were found unsatisfiable.
+        """
+        with self.stats.phase("preprocess"):
+            self.propagate_units()
+            self.subsume()
+            if self.ok:
+                self.probe()
+            for _ in range(rounds):
+                self.subsume()
+                if not self.ok or not self.eliminate():
+                    break
+            self.subsume()
+        return self.result()
+
+    def result(self):
+        if not self.ok:
+            return [[]]
+        return [sorted(clause, key=abs) for clause in self.clauses if clause is not None]
+
+    def reconstruct(self, valuation):
+        """
+        Extends a valuation of the simplified clauses, for example {1: True, 3: False}, to one of the original
+        clauses. Variables that are not in the valuation nor fixed by the preprocessing get False.
+        """
+        model = {var: False for var in range(1, self.total_atoms + 1)}
+        model.update(valuation)
+        model.update(self.assigned)
+        for literal, clause in reversed(self.stack):
+            if not any(model[abs(q)] == (q > 0) for q in clause):
+                model[abs(literal)] = literal > 0
+        return model
@@ -0,0 +1,227 @@
+"""Unit propagation over integer (DIMACS) clauses using two watched literals.
+
+Each clause watches two of its literals and is only visited when one of them becomes false, so
+a propagation step costs time proportional to the clauses watching the falsified literal instead
+of the total size of the clause set. Clauses are never shortened: the literals of a clause are only
+reordered so that the watched ones stay in the first two positions.
+
+propagator = Propagator([[1, -2], [2, 3], [-1, -3]])
+propagator.new_decision_level()
+propagator.enqueue(-1, None)
+propagator.propagate()  # assigns -2 and 3
+"""
+
+
+from stats import SolverStats
+
+
+class Propagator:
+    def __init__(self, clauses=(), stats=None):
+        self.stats = stats if stats is not None else SolverStats()
+        self.heuristic = None  # the BranchingHeuristic told about every unassigned variable, see heuristics.py
+        self.clauses = []
+        self.num_vars = 0
+        self.ok = True
+
+        self.assigns = [0]  # 1 = True, -1 = False, 0 = unassigned (indexed by variable)
+        self.levels = [0]
+        self.reasons = [None]
+        self.watches = {}  # literal -> indexes of the clauses watching it
+        self.occurrences = {}  # literal -> indexes of the clauses where it occurs
+        self.used_vars = set()
+
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def new_var(self):
+        self.num_vars += 1
+        self.assigns.append(0)
+        self.levels.append(0)
+        self.reasons.append(None)
+        for literal in (self.num_vars, -self.num_vars):
+            self.watches[literal] = []
+            self.occurrences[literal] = []
+        return self.num_vars
+
+    def value(self, literal):
+        if literal > 0:
+            return self.assigns[literal]
+        return -self.assigns[-literal]
+
+    def decision_level(self):
+        return len(self.trail_lim)
+
+    def new_decision_level(self):
+        self.trail_lim.append(len(self.trail))
+
+    def add_clause(self, clause):
+        """
+        Adds a clause at decision level 0. Duplicated literals and literals already false are removed,
+        and tautologies or satisfied clauses are ignored.
+        Return False if the clause set became trivially unsatisfiable.
+        """
+        if not self.ok:
+            return False
+
+        literals = []
+        for literal in clause:
+            while abs(literal) > self.num_vars:
+                self.new_var()
+            self.used_vars.add(abs(literal))
+            value = self.value(literal)
+            if value == 1 or -literal in literals:
+                return True
+            if value == 0 and literal not in literals:
+                literals.append(literal)
+
+        if not literals:
+            self.ok = False
+            return False
+
+        if len(literals) == 1:
+            self.enqueue(literals[0], None)
+            return True
+
+        self.attach(literals)
+        return True
+
+    def attach(self, literals):
+        """
+        Stores a clause with at least two literals, watching the first two.
+        Return the index of the clause.
+        """
+        index = len(self.clauses)
+        self.clauses.append(literals)
+        self.watches[literals[0]].append(index)
+        self.watches[literals[1]].append(index)
+        for literal in literals:
+            self.occurrences[literal].append(index)
+        return index
+
+    def enqueue(self, literal, reason):
+        var = abs(literal)
+        self.assigns[var] = 1 if literal > 0 else -1
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Propagates every literal in the trail that was not propagated yet.
+        Return the index of a conflicting clause, or None if there's no conflict.
+        """
+        assigns = self.assigns
+        clauses = self.clauses
+        watches = self.watches
+        trail = self.trail
+        start = self.qhead
+
+        while self.qhead < len(trail):
+            false_literal = -trail[self.qhead]
+            self.qhead += 1
+            watching = watches[false_literal]
+            i = j = 0
+            total = len(watching)
+
+            while i < total:
+                index = watching[i]
+                i += 1
+                clause = clauses[index]
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+
+                first = clause[0]
+                first_value = assigns[first] if first > 0 else -assigns[-first]
+                if first_value == 1:
+                    watching[j] = index
+                    j += 1
+                    continue
+
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if (assigns[literal] if literal > 0 else -assigns[-literal]) != -1:
+                        clause[1], clause[k] = literal, false_literal
+                        watches[literal].append(index)
+                        break
+                else:
+                    watching[j] = index
+                    j += 1
+                    if first_value == -1:
+                        while i < total:
+                            watching[j] = watching[i]
+                            j += 1
+                            i += 1
+                        del watching[j:]
+                        self.stats.propagations += self.qhead - start
+                        self.qhead = len(trail)
+                        return index
+                    self.enqueue(first, index)
+
+            del watching[j:]
+        self.stats.propagations += self.qhead - start
+        return None
+
+    def backtrack(self, level):
+        """
+        Undoes every assignment made above the decision 'level'.
+        """
+        if len(self.trail_lim) <= level:
+            return
+        self.stats.backtracks += 1
+        limit = self.trail_lim[level]
+        for i in range(len(self.trail) - 1, limit - 1, -1):
+            literal = self.trail[i]
+            var = abs(literal)
+            self.assigns[var] = 0
+            self.reasons[var] = None
+            self.unassigned(literal)
+        del self.trail[limit:]
+        del self.trail_lim[level:]
+        self.qhead = limit
+
+    def unassigned(self, literal):
+        """
+        Called by backtrack for every literal of the trail that loses its value.
+        """
+        if self.heuristic is not None:
+            self.heuristic.unassigned(literal)
+
+    def unresolved_clauses(self, clauses=None):
+        """
+        Return the clauses that are not satisfied yet, without their false literals.
+        Only 'clauses' is checked when it is given, for example the result of a previous call made with
+        fewer assignments; clauses without any assigned literal are returned as they are, not copied.
+        """
+        if clauses is None:
+            clauses = self.clauses
+
+        assigns = self.assigns
+        result = []
+        for clause in clauses:
+            for literal in clause:
+                if assigns[literal if literal > 0 else -literal] != 0:
+                    break
+            else:
+                result.append(clause)
+                continue
+
+            remaining = []
+            for literal in clause:
+                value = assigns[literal] if literal > 0 else -assigns[-literal]
+                if value == 1:
+                    break
+                if value == 0:
+                    remaining.append(literal)
+            else:
+                result.append(remaining)
+        return result
+
+    def valuation(self):
+        """
+        Return the current assignment as a dictionary, for example {1: True, 2: False}.
+        """
+        return {var: self.assigns[var] == 1 for var in sorted(self.used_vars) if self.assigns[var] != 0}
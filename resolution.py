@@ -0,0 +1,193 @@
+"""Saturation by resolution, with indexed clauses.
+
+ResolutionProver derives resolvents until it finds the empty clause (the clauses are unsatisfiable) or no
+new clause can be derived (they are satisfiable). Instead of trying every pair of clauses in each round:
+
+- clauses are frozensets of literals, kept in a hash table, so a repeated resolvent is found in O(1);
+- an index from each literal to the clauses where it occurs gives the clauses that can be resolved with a
+  clause on each of its literals, so only complementary pairs are tried;
+- a resolvent that contains a clause already kept is discarded (forward subsumption), and the clauses that
+  contain a new clause are deleted (backward subsumption);
+- a literal is removed from a resolvent when resolving the resolvent with a kept clause on it gives a clause
+  that subsumes the resolvent (subsumption resolution), so the short clauses that lead to the empty clause
+  appear early;
+- the search follows the set of support strategy: resolvents are only derived from a clause of the set of
+  support, which starts with the negative clauses and receives every resolvent, and the shortest clauses
+  of the set are chosen first. The clauses outside it are satisfied by making every atom true, so the
+  strategy is still complete.
+
+The literals can be the integers of DIMACS, [[1, -2], [2]], or Atom and Not formulas, [[p, Not(q)], [q]].
+
+prover = ResolutionProver([[1, 2], [-1, 2], [1, -2], [-1, -2]])
+prover.refute()  # True: the empty clause was derived
+"""
+
+
+import heapq
+from collections import defaultdict
+from itertools import combinations
+
+from formula import Not
+from stats import SolverStats
+
+
+def negate(literal):
+    if isinstance(literal, int):
+        return -literal
+    if isinstance(literal, Not):
+        return literal.inner
+    return Not(literal)
+
+
+def is_negative(literal):
+    if isinstance(literal, int):
+        return literal < 0
+    return isinstance(literal, Not)
+
+
+class ResolutionProver:
+    def __init__(self, clauses, support=None, stats=None):
+        """
+        'support' is the initial set of support, a list of clauses that are added to 'clauses', for example
+        the clauses of a negated conjecture. It must be chosen so that the other clauses are satisfiable,
+        otherwise the search is not complete; by default it has the clauses in which every literal is negative.
+        """
+        self.stats = stats if stats is not None else SolverStats()
+        self.ids = {}  # literal -> integer, the literals are numbered so that the complement of l is -l
+        self.clauses = []  # frozensets of literal numbers, None for the deleted ones
+        self.keys = set()
+        self.occurrences = defaultdict(set)  # literal -> indexes of every clause kept
+        self.usable = defaultdict(set)  # literal -> indexes of the clauses already chosen
+        self.queue = []  # (length, index) of the clauses in the set of support
+        self.empty = False
+
+        if support is None:
+            support = [clause for clause in clauses if all(is_negative(literal) for literal in clause)]
+        else:
+            clauses = list(clauses) + list(support)
+        support = {self.convert(clause) for clause in support}
+        for clause in clauses:
+            clause = self.convert(clause)
+            if clause is not None and not self.subsumed(clause):
+                self.keep(clause, clause in support)
+
+    def convert(self, clause):
+        """
+        Numbers the literals of 'clause', returning None if it's a tautology.
+        """
+        numbers = set()
+        for literal in clause:
+            number = self.ids.get(literal)
+            if number is None:
+                complement = self.ids.get(negate(literal))
+                number = -complement if complement is not None else len(self.ids) + 1
+                self.ids[literal] = number
+            if -number in numbers:
+                return None
+            numbers.add(number)
+        return frozenset(numbers)
+
+    def subsumed(self, clause, literal=None):
+        """
+        Whether a kept clause is contained in 'clause'. With 'literal', only the clauses that have it count.
+        """
+        if clause in self.keys:
+            return True
+        if literal is None:
+            rest, fixed, literals = clause, (), clause
+        else:
+            rest, fixed, literals = clause - {literal}, (literal,), (literal,)
+        scan = sum(len(self.occurrences[q]) for q in literals)
+        if 2 ** len(rest) < scan:
+            # short clause with many candidates: look its subsets up in the table instead
+            return any(frozenset(subset + fixed) in self.keys
+                       for size in range(len(rest)) for subset in combinations(rest, size))
+        for q in literals:
+            for index in self.occurrences[q]:
+                other = self.clauses[index]
+                if len(other) <= len(clause) and other <= clause:
+                    return True
+        return False
+
+    def strengthen(self, clause):
+        """
+        Removes from 'clause' each literal l such that a kept clause is contained in the clause with l
+        replaced by its complement, since their resolvent on l subsumes 'clause' (subsumption resolution).
+        """
+        for literal in list(clause):
+            if self.subsumed(clause - {literal} | {-literal}, -literal):
+                clause = clause - {literal}
+                self.stats.resolvents += 1
+        return clause
+
+    def delete(self, index):
+        clause = self.clauses[index]
+        for literal in clause:
+            self.occurrences[literal].discard(index)
+            self.usable[literal].discard(index)
+        self.keys.discard(clause)
+        self.clauses[index] = None
+        self.stats.deleted += 1
+
+    def keep(self, clause, support):
+        """
+        Adds a clause that is not subsumed, deleting the clauses it subsumes. Clauses in the set of support
+        wait in the queue; the others can be resolved with right away.
+        """
+        if not clause:
+            self.empty = True
+            return
+        rarest = min(clause, key=lambda literal: len(self.occurrences[literal]))
+        for other in list(self.occurrences[rarest]):
+            if len(self.clauses[other]) >= len(clause) and clause <= self.clauses[other]:
+                self.delete(other)
+
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.keys.add(clause)
+        for literal in clause:
+            self.occurrences[literal].add(index)
+        if support:
+            heapq.heappush(self.queue, (len(clause), index))
+        else:
+            for literal in clause:
+                self.usable[literal].add(index)
+
+    def resolve(self, index):
+        """
+        Resolves the clause 'index' with every usable clause that has a complementary literal.
+        """
+        clause = self.clauses[index]
+        for literal in clause:
+            rest = clause - {literal}
+            for other in list(self.usable[-literal]):
+                if self.clauses[index] is None:
+                    return  # subsumed by one of its own resolvents
+                if self.clauses[other] is None:
+                    continue
+                other_rest = self.clauses[other] - {-literal}
+                if any(-q in rest for q in other_rest):
+                    continue  # tautology
+                self.stats.resolvents += 1
+                resolvent = self.strengthen(rest | other_rest)
+                if not self.subsumed(resolvent):
+                    self.keep(resolvent, True)
+                    if self.empty:
+                        return
+
+    def refute(self):
+        """
+        Return True if the empty clause is derived, False if the clauses are saturated without it.
+        """
+        with self.stats.phase("solve"):
+            while self.queue and not self.empty:
+                _, index = heapq.heappop(self.queue)
+                if self.clauses[index] is None:
+                    continue
+                for literal in self.clauses[index]:
+                    self.usable[literal].add(index)
+                self.resolve(index)
+                self.stats.tick()
+            if self.empty:
+                self.stats.conflicts += 1
+            return self.empty
@@ -0,0 +1,121 @@
+"""Restart policies of CDCLSolver.
+
+A restart undoes every decision but keeps the learned clauses and the activities and saved phases of the
+branching heuristic, so the search leaves a region where it was stuck without losing what it learned.
+The policy is told the literal block distance (LBD, the number of decision levels in the clause) of each
+learned clause and answers whether to restart:
+
+- "luby": after unit * 1, 1, 2, 1, 1, 2, 4, 1, ... conflicts, the sequence of Luby et al. (1993).
+- "geometric": after first, first * factor, first * factor², ... conflicts.
+- "glucose": when the LBDs of the last 'window' learned clauses are worse than the average of all of them,
+  the dynamic restarts of Glucose (Audemard and Simon, 2012).
+- "none": never.
+
+policy = make_restart_policy("luby")
+CDCLSolver(clauses, restarts="glucose")
+"""
+
+
+from collections import deque
+
+
+def luby(i):
+    """Returns the i-th element (from 0) of the Luby sequence: 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ..."""
+    size, power = 1, 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        power -= 1
+        i %= size
+    return 1 << power
+
+
+class RestartPolicy:
+    """
+    conflict() is called with the LBD of each learned clause and returns True when the solver should restart,
+    and restarted() is called after each restart.
+    """
+    def conflict(self, lbd):
+        return False
+
+    def restarted(self):
+        pass
+
+
+class LubyRestarts(RestartPolicy):
+    def __init__(self, unit=100):
+        self.unit = unit
+        self.restarts = 0
+        self.conflicts = 0
+
+    def conflict(self, lbd):
+        self.conflicts += 1
+        return self.conflicts >= self.unit * luby(self.restarts)
+
+    def restarted(self):
+        self.restarts += 1
+        self.conflicts = 0
+
+
+class GeometricRestarts(RestartPolicy):
+    def __init__(self, first=100, factor=1.5):
+        self.limit = first
+        self.factor = factor
+        self.conflicts = 0
+
+    def conflict(self, lbd):
+        self.conflicts += 1
+        return self.conflicts >= self.limit
+
+    def restarted(self):
+        self.limit *= self.factor
+        self.conflicts = 0
+
+
+class GlucoseRestarts(RestartPolicy):
+    def __init__(self, window=50, margin=0.8):
+        """
+        Restarts when the average LBD of the last 'window' learned clauses, times 'margin', is above the
+        average LBD of every learned clause.
+        """
+        self.recent = deque(maxlen=window)
+        self.recent_sum = 0
+        self.margin = margin
+        self.total = 0
+        self.count = 0
+
+    def conflict(self, lbd):
+        if len(self.recent) == self.recent.maxlen:
+            self.recent_sum -= self.recent[0]
+        self.recent.append(lbd)
+        self.recent_sum += lbd
+        self.total += lbd
+        self.count += 1
+        return (len(self.recent) == self.recent.maxlen and
+                self.recent_sum / len(self.recent) * self.margin > self.total / self.count)
+
+    def restarted(self):
+        self.recent.clear()
+        self.recent_sum = 0
+
+
+RESTARTS = ("none", "luby", "geometric", "glucose")
+
+
+def make_restart_policy(policy):
+    """
+    Return 'policy' if it's already a RestartPolicy, or a new one of the kind named by it.
+    """
+    if isinstance(policy, RestartPolicy):
+        return policy
+    if policy == "none":
+        return RestartPolicy()
+    if policy == "luby":
+        return LubyRestarts()
+    if policy == "geometric":
+        return GeometricRestarts()
+    if policy == "glucose":
+        return GlucoseRestarts()
+    raise ValueError(f"Unknown restart policy: {policy}")
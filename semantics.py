@@ -5,8 +5,20 @@ in propositional logic.
 
 
 from formula import Atom, Implies, Not, And, Or
-from functions import atoms, valuations
-from collections import defaultdict, Counter
+from functions import atoms, children, post_order
+from cdcl import CDCLSolver
+from heuristics import make_heuristic
+from preprocess import Preprocessor
+from propagation import Propagator
+from resolution import ResolutionProver
+from stats import SolverStats
+from truth_table import are_equivalent, is_tautology
+from tseitin import TseitinEncoder
+from collections import Counter
+
+
+# formulas with more atoms are checked by is_valid with is_satisfiable instead of a truth table
+TRUTH_TABLE_ATOMS = 20
 
 
 def truth_value(formula, interpretation):
@@ -26,21 +38,24 @@ def truth_value(formula, interpretation):
         return not inner
 
     if isinstance(formula, And):
-        left = truth_value(formula.left, interpretation)
-        right = truth_value(formula.right, interpretation)
-
-        if (right is None and left is False) or (left is None and right is False):
-            return False
-        return left and right
+        left = truth_value(formula.operands[0], interpretation)
+        for operand in formula.operands[1:]:
+            right = truth_value(operand, interpretation)
+            if (right is None and left is False) or (left is None and right is False):
+                left = False
+            else:
+                left = left and right
+        return left
 
     if isinstance(formula, Or):
-        left = truth_value(formula.left, interpretation)
-        right = truth_value(formula.right, interpretation)
-
-        if left is None or right is None:
-            return None
-
-        return left or right
+        left = truth_value(formula.operands[0], interpretation)
+        for operand in formula.operands[1:]:
+            right = truth_value(operand, interpretation)
+            if left is None or right is None:
+                left = None
+            else:
+                left = left or right
+        return left
 
     if isinstance(formula, Implies):
         left = truth_value(formula.left, interpretation)
@@ -55,44 +70,92 @@ def truth_value(formula, interpretation):
                     truth_value(formula.right, interpretation) is False)
 
 
+def compile_truth_value(formula):
+    """Compiles a formula into a function of an interpretation that returns the same value as truth_value,
+    None included when an atom is missing from the interpretation. For example:
+
+    evaluate = compile_truth_value(Implies(Atom('p'), Atom('q')))
+    evaluate({'p': True, 'q': False})  # False
+
+    The formula is turned into Python code once, one line per distinct subformula, so evaluating it
+    under many interpretations costs no recursion nor isinstance checks.
+    """
+    namespace = {}
+    registers = {}
+    lines = ["def evaluate(interpretation):", "    get = interpretation.get"]
+    for node in post_order(formula):
+        register = f"t{len(registers)}"
+        registers[node] = register
+        operands = [registers[child] for child in children(node)]
+        if isinstance(node, Atom):
+            namespace[f"name{register}"] = node.name
+            code = f"get(name{register})"
+        elif isinstance(node, Not):
+            code = f"None if {operands[0]} is None else not {operands[0]}"
+        elif isinstance(node, And):
+            values = ", ".join(operands)
+            code = f"False if False in ({values},) else None if None in ({values},) else True"
+        elif isinstance(node, Or):
+            values = ", ".join(operands)
+            code = f"None if None in ({values},) else True if True in ({values},) else False"
+        else:  # Implies
+            left, right = operands
+            code = (f"True if {left} is False or ({left} is None and {right} is True) else "
+                    f"None if {left} is None else {right} is not False")
+        lines.append(f"    {register} = {code}")
+    lines.append(f"    return {registers[formula]}")
+    exec("\n".join(lines), namespace)
+    return namespace["evaluate"]
+
+
 def is_logical_consequence(premises, conclusion):  # function TT-Entails? in the book AIMA.
     """Returns True if the conclusion is a logical consequence of the set of premises. Otherwise,
     it returns False.
     """
-    return is_satisfiable(And(premises, Not(conclusion))) is False
+    return is_satisfiable(And(*premises, Not(conclusion))) is False
 
 
 def is_logical_equivalence(formula1, formula2):
-    """Checks whether formula1 and formula2 are logically equivalent."""
-    v = valuations(atoms(formula1).union(atoms(formula2)))
-
-    for k in v:
-        if truth_value(formula1, k) != truth_value(formula2, k):
-            return False
-    return True
+    """Checks whether formula1 and formula2 are logically equivalent, over a bit-parallel truth table
+    (see truth_table.py)."""
+    return are_equivalent(formula1, formula2)
 
 
 def is_valid(formula):
-    """Returns True if formula is a logically valid (tautology). Otherwise, it returns False"""
+    """Returns True if formula is a logically valid (tautology). Otherwise, it returns False.
+    Formulas with up to TRUTH_TABLE_ATOMS atoms are checked over a truth table, larger ones with is_satisfiable."""
+    if len(atoms(formula)) <= TRUTH_TABLE_ATOMS:
+        return is_tautology(formula)
     return is_satisfiable(Not(formula)) is False
 
 
-def sat(formula, _atoms, interpretation):
+def sat(formula, _atoms, interpretation, stats=None, evaluate=None):
+    """'evaluate' is compile_truth_value(formula), compiled here when it isn't given."""
+    if stats is None:
+        stats = SolverStats()
+    if evaluate is None:
+        evaluate = compile_truth_value(formula)
     if len(_atoms) == 0:
-        if truth_value(formula, interpretation):
+        if evaluate(interpretation):
             return interpretation
+        stats.conflicts += 1
+        stats.tick()
         return False
 
     _atom = _atoms.pop()
     interpretation1 = interpretation.copy()
     interpretation2 = interpretation.copy()
+    stats.decisions += 1
+    stats.tick()
+    stats.branch_copies += 2
 
     interpretation1.update({_atom: True})
     interpretation2.update({_atom: False})
-    result = sat(formula, _atoms.copy(), interpretation1)
+    result = sat(formula, _atoms.copy(), interpretation1, stats, evaluate)
     if result is not False:
         return result
-    return sat(formula, _atoms.copy(), interpretation2)
+    stats.backtracks += 1
+    return sat(formula, _atoms.copy(), interpretation2, stats, evaluate)
 
 
 def preprocess_formula(formula):
@@ -104,23 +167,27 @@ def preprocess_formula(formula):
             return {formula.inner.name: False}
 
     if isinstance(formula, And):
-        left = preprocess_formula(formula.left)
-        right = preprocess_formula(formula.right)
-        left.update(right)
+        interpretation = {}
+        for operand in formula.operands:
+            interpretation.update(preprocess_formula(operand))
 
-        return left
+        return interpretation
 
     return {}
 
 
-def is_satisfiable(formula):
+def is_satisfiable(formula, stats=None):
     """Checks whether formula is satisfiable.
     In other words, if the input formula is satisfiable, it returns an interpretation that assigns
-    true to the formula. Otherwise, it returns False."""
-    interpretation = preprocess_formula(formula)
-    atoms_names = {a.name for a in atoms(formula)}
-    list_atoms = atoms_names - set(interpretation.keys())
-    return sat(formula, list_atoms, interpretation)
+    true to the formula. Otherwise, it returns False.
+    The work done is counted in 'stats', a SolverStats, when one is given."""
+    if stats is None:
+        stats = SolverStats()
+    with stats.phase("solve"):
+        interpretation = preprocess_formula(formula)
+        atoms_names = {a.name for a in atoms(formula)}
+        list_atoms = atoms_names - set(interpretation.keys())
+        return sat(formula, list_atoms, interpretation, stats)
 
 
 def remove_implication(formula):
@@ -136,9 +203,7 @@ def remove_implication(formula):
         return Or(Not(left), right)
 
     if isinstance(formula, (And, Or)):
-        formula.left = remove_implication(formula.left)
-        formula.right = remove_implication(formula.right)
-        return formula
+        return type(formula)(*[remove_implication(operand) for operand in formula.operands])
 
 
 def is_literal(formula):
@@ -150,18 +215,16 @@ def negation_normal_form(formula):
         return formula
 
     if isinstance(formula, (And, Or)):
-        formula.left = negation_normal_form(formula.left)
-        formula.right = negation_normal_form(formula.right)
-        return formula
+        return type(formula)(*[negation_normal_form(operand) for operand in formula.operands])
 
     if isinstance(formula, Not):
         inner = formula.inner
         if isinstance(inner, Not):
             return negation_normal_form(inner.inner)
         elif isinstance(inner, And):
-            return Or(negation_normal_form(Not(inner.left)), negation_normal_form(Not(inner.right)))
+            return Or(*[negation_normal_form(Not(operand)) for operand in inner.operands])
         elif isinstance(inner, Or):
-            return And(negation_normal_form(Not(inner.left)), negation_normal_form(Not(inner.right)))
+            return And(*[negation_normal_form(Not(operand)) for operand in inner.operands])
 
 
 def distributive(formula):
@@ -169,24 +232,40 @@ def distributive(formula):
         return formula
 
     if isinstance(formula, And):
-        formula.left = distributive(formula.left)
-        formula.right = distributive(formula.right)
-        return formula
+        return And(*[distributive(operand) for operand in formula.operands])
 
     if isinstance(formula, Or):
-        left_subformula = distributive(formula.left)
-        right_subformula = distributive(formula.right)
-        if isinstance(left_subformula, And):
-            return And(distributive(Or(left_subformula.left, left_subformula)),
-                       distributive(Or(left_subformula.right, right_subformula)))
-        if isinstance(right_subformula, And):
-            return And(distributive(Or(left_subformula, right_subformula.left)),
-                       distributive(Or(left_subformula, right_subformula.right)))
-        return Or(left_subformula, right_subformula)
+        result = distributive(formula.operands[0])
+        for operand in formula.operands[1:]:
+            result = distribute_or(result, distributive(operand))
+        return result
 
 
-def cnf(formula):
-    return distributive(negation_normal_form(remove_implication(formula)))
+def distribute_or(left_subformula, right_subformula):
+    """Returns the CNF of (left_subformula v right_subformula), where both are already in CNF."""
+    if isinstance(left_subformula, And):
+        return And(*[distribute_or(operand, right_subformula) for operand in left_subformula.operands])
+    if isinstance(right_subformula, And):
+        return And(*[distribute_or(left_subformula, operand) for operand in right_subformula.operands])
+    return Or(left_subformula, right_subformula)
+
+
+def cnf(formula, mode="distributive", stats=None):
+    """Converts a formula to conjunctive normal form.
+    With mode="distributive" the result is an equivalent formula, obtained by distributing Or over And.
+    With mode="tseitin" or mode="plaisted-greenbaum" auxiliary variables are introduced instead, and the
+    result is a pair (clauses, names): the clauses in integer (DIMACS) form, whose size is linear in the
+    size of the formula, and a map from the variables of the original atoms to their names.
+    The time spent is added to the "cnf" phase of 'stats', a SolverStats, when one is given."""
+    if mode not in ("distributive", "tseitin", "plaisted-greenbaum"):
+        raise ValueError(f"Unknown CNF conversion mode: {mode}")
+    if stats is None:
+        stats = SolverStats()
+    with stats.phase("cnf"):
+        if mode == "distributive":
+            return distributive(negation_normal_form(remove_implication(formula)))
+        encoder = TseitinEncoder(polarity=mode == "plaisted-greenbaum")
+        return encoder.encode(formula), encoder.names()
 
 
 def get_all_literals(formula):
@@ -194,7 +273,7 @@ def get_all_literals(formula):
         return {formula}
 
     if isinstance(formula, Or):
-        return get_all_literals(formula.left).union(get_all_literals(formula.right))
+        return set().union(*[get_all_literals(operand) for operand in formula.operands])
 
 
 def cnf_clausal(formula):
@@ -205,32 +284,10 @@ def cnf_clausal(formula):
         return [list(get_all_literals(formula))]
 
     if isinstance(formula, And):
-        left = cnf_clausal(formula.left)
-        right = cnf_clausal(formula.right)
-        return left + right
-
-
-def has_one_literals_pair(c1, c2):
-    count_pairs = defaultdict(lambda: 0)
-    for c in c1:
-        if isinstance(c, Atom) and Not(c) in c2:
-            count_pairs[c] += 1
-        elif isinstance(c, Not) and c.inner in c2:
-            count_pairs[c] += 1
-    return sum(count_pairs.values()) == 1
-
-
-def res(clause1, clause2):
-    c1 = clause1.copy()
-    c2 = clause2.copy()
-    for c in c1:
-        if isinstance(c, Atom) and Not(c) in c2:
-            c1.remove(c)
-            c2.remove(Not(c))
-        elif isinstance(c, Not) and c.inner in c2:
-            c1.remove(c)
-            c2.remove(c.inner)
-    return list(set(c1 + c2))  # temporary?
+        clauses = []
+        for operand in formula.operands:
+            clauses.extend(cnf_clausal(operand))
+        return clauses
 
 
 def find_interpretation(clauses):
@@ -241,89 +298,39 @@ def find_interpretation(clauses):
                 valuation.update({literal.name: True})
             elif isinstance(literal, Not):
                 valuation.update({literal.inner.name: False})
+            elif isinstance(literal, int):
+                valuation.update({abs(literal): literal > 0})
     return valuation
 
 
-def resolution(clauses):  # clauses -> [[p, s, r], [~s, r], [~p], [~r]]
-    new_clauses = []
-    index = 0
-    while True:
-        for i in range(index, len(clauses)):
-            for j in range(len(clauses)):
-                if has_one_literals_pair(clauses[i], clauses[j]):
-                    resolvent = res(clauses[i], clauses[j])
-                    if not resolvent:
-                        return False
-                    if resolvent not in new_clauses:
-                        new_clauses.append(resolvent)
-        if not new_clauses:
-            return find_interpretation(clauses)
-        index = len(clauses)
-        for clause in new_clauses:
-            if clause not in clauses:
-                clauses.append(clause)
-        new_clauses.clear()
-
-
-def dpll(clauses):
-    return dpll_check(clauses, {})
-
-
-def has_unit_clause(clauses):
-    for clause in clauses:
-        if len(clause) == 1:
-            return True
-    return False
-
-
-def set_valuation(literal, valuation):
-    if literal < 0:
-        valuation[literal * -1] = False
-    else:
-        valuation[literal] = True
-    # if isinstance(literal, Atom):
-        # valuation[literal.name] = True
-    # elif isinstance(literal, Not):
-        # valuation[literal.inner.name] = False
-
-
-def remove_clauses_with_literal(clauses, literal, valuation):
-    for clause in clauses[:]:
-        if literal in clause:
-            for l in clause:
-                set_valuation(l, valuation)
-            clauses.remove(clause)
-    return clauses
-
-
-def remove_complement_literal(clauses, literal):
-    for clause in clauses:
-        if literal > 0 and -literal in clause:
-            clause.remove(-literal)
-        elif literal < 0 and (literal * -1) in clause:
-            clause.remove(literal * -1)
-        # if isinstance(literal, Atom) and Not(literal) in clause:
-            # clause.remove(Not(literal))
-        # elif isinstance(literal, Not) and literal.inner in clause:
-            # clause.remove(literal.inner)
-    return clauses
-
-
-def get_literal(clauses):
-    for clause in clauses:
-        if len(clause) == 1:
-            return clause[0]
-    return None
-
-def unit_propagation(clauses, valuation):
-    while has_unit_clause(clauses):
-        literal = get_literal(clauses)
-
-        set_valuation(literal, valuation)
-
-        clauses = remove_clauses_with_literal(clauses, literal, valuation)
-        clauses = remove_complement_literal(clauses, literal)
-    return clauses, valuation
+def resolution(clauses, stats=None, support=None):  # clauses -> [[p, s, r], [~s, r], [~p], [~r]]
+    """Checks satisfiability by saturating the clauses with resolution, see resolution.py.
+    Returns False if the empty clause is derived, otherwise the interpretation given by find_interpretation.
+    'support' is the initial set of support, by default the clauses whose literals are all negative."""
+    prover = ResolutionProver(clauses, support, stats)
+    if prover.refute():
+        return False
+    return find_interpretation(clauses)
+
+
+def dpll(clauses, stats=None, heuristic="evsids", preprocess=False):
+    """The work done is counted in 'stats', a SolverStats, when one is given.
+    'heuristic' chooses the decisions: "evsids", "vsids", "static" or a BranchingHeuristic (see heuristics.py),
+    or None for get_atomic over the clauses not satisfied yet.
+    With 'preprocess' the clauses are simplified first by a Preprocessor (see preprocess.py), and the
+    valuation is mapped back to the original variables."""
+    preprocessor = None
+    if preprocess:
+        preprocessor = Preprocessor(clauses, stats=stats)
+        clauses = preprocessor.run()
+    propagator = Propagator(clauses, stats)
+    if heuristic is not None:
+        heuristic = make_heuristic(heuristic)
+    with propagator.stats.phase("solve"):
+        valuation = dpll_check(propagator, heuristic)
+    if valuation is False or preprocessor is None:
+        return valuation
+    return preprocessor.reconstruct(valuation)
 
 
 def get_atomic(clauses):
@@ -349,25 +356,105 @@ def has_only_empty_clauses(clauses):
     return True
 
 
-def dpll_check(clauses, valuation):
-    clauses, valuation = unit_propagation(clauses, valuation)
-    if not clauses:
-        return valuation
-
-    if [] in clauses:
+def dpll_check(propagator, heuristic=None):
+    """DPLL with chronological backtracking over the assignments of a Propagator.
+    Unit propagation is done with watched literals, so the clauses are never copied or rewritten,
+    and the decisions are kept in the trail instead of in the call stack.
+    The decisions are picked by 'heuristic', a BranchingHeuristic, whose activities are bumped for the
+    variables of each conflicting clause; without one, get_atomic chooses among the unresolved clauses.
+    Returns a valuation, or False if the clauses are unsatisfiable."""
+    if not propagator.ok:
         return False
+    if heuristic is not None:
+        return dpll_heuristic(propagator, heuristic)
 
-    atomic = get_atomic(clauses)
-    clauses1 = clauses + [[atomic]]
-
-    clauses2 = clauses + [[atomic * -1]]
-    # if isinstance(atomic, Not):
-        # clauses2 = clauses + [[atomic.inner]]
-    # else:
-        # clauses2 = clauses + [[Not(atomic)]]
-    result = dpll_check(clauses1, valuation)
-
-    if result:
-        return result
-
-    return dpll_check(clauses2, valuation)
+    stats = propagator.stats
+    flipped = []  # one entry per decision level: whether its decision was already flipped
+    candidates = [None]  # clauses still unresolved before each decision, so deeper levels scan less
+    while True:
+        if propagator.propagate() is not None:
+            stats.conflicts += 1
+            stats.tick()
+            while flipped and flipped[-1]:
+                flipped.pop()
+            if not flipped:
+                return False
+
+            level = len(flipped) - 1
+            atomic = propagator.trail[propagator.trail_lim[level]]
+            propagator.backtrack(level)
+            propagator.new_decision_level()
+            propagator.enqueue(-atomic, None)
+            flipped[-1] = True
+            del candidates[level + 2:]
+            continue
+
+        clauses = propagator.unresolved_clauses(candidates[-1])
+        if not clauses:
+            return propagator.valuation()
+
+        atomic = get_atomic(clauses)
+        candidates.append(clauses)
+        stats.decisions += 1
+        stats.tick()
+        propagator.new_decision_level()
+        propagator.enqueue(atomic, None)
+        flipped.append(False)
+
+
+def dpll_heuristic(propagator, heuristic):
+    """dpll_check with the decisions picked by 'heuristic', which costs O(log n) per decision instead of a
+    scan of the unresolved clauses."""
+    heuristic.attach(propagator)
+    heuristic.reset()
+    stats = propagator.stats
+    flipped = []
+    while True:
+        conflict = propagator.propagate()
+        if conflict is not None:
+            stats.conflicts += 1
+            stats.tick()
+            for literal in propagator.clauses[conflict]:
+                heuristic.bump(abs(literal))
+            heuristic.decay()
+
+            while flipped and flipped[-1]:
+                flipped.pop()
+            if not flipped:
+                return False
+
+            level = len(flipped) - 1
+            atomic = propagator.trail[propagator.trail_lim[level]]
+            propagator.backtrack(level)
+            propagator.new_decision_level()
+            propagator.enqueue(-atomic, None)
+            flipped[-1] = True
+            continue
+
+        atomic = heuristic.pick()
+        if atomic is None:
+            return propagator.valuation()
+
+        stats.decisions += 1
+        stats.tick()
+        propagator.new_decision_level()
+        propagator.enqueue(atomic, None)
+        flipped.append(False)
+
+
+def cdcl(clauses, stats=None, heuristic="evsids", preprocess=False):
+    """Conflict-driven clause learning counterpart of dpll.
+    Receives the clauses in the same integer form as dpll, for example [[1, -2], [2]], and returns
+    a valuation such as {1: True, 2: True}, or False if the clauses are unsatisfiable.
+    The work done is counted in 'stats', a SolverStats, when one is given, and 'heuristic' and
+    'preprocess' are the same as in dpll."""
+    preprocessor = None
+    if preprocess:
+        preprocessor = Preprocessor(clauses, stats=stats)
+        clauses = preprocessor.run()
+    solver = CDCLSolver(clauses, stats, heuristic)
+    if not solver.solve():
+        return False
+    if preprocessor is None:
+        return solver.model()
+    return preprocessor.reconstruct(solver.model())
@@ -0,0 +1,77 @@
+"""Counters and timers of the solvers.
+
+Every solver counts its work in a SolverStats: decisions, propagated literals, conflicts, backtracks and
+copies of the state made to branch, plus the time spent in each phase (encoding, CNF conversion, DIMACS
+mapping, solving). Counting is one attribute increment per event, so it is always on; pass a SolverStats to
+a solver to read the numbers afterwards, and give it a 'progress' interval to have them printed during long
+solves.
+
+stats = SolverStats(progress=5)  # print a line every 5 seconds
+dpll(clauses, stats)
+print(stats.as_dict())  # {'decisions': 120, 'propagations': 2301, ..., 'times': {'solve': 0.02}}
+"""
+
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+
+COUNTERS = ("decisions", "propagations", "conflicts", "backtracks", "branch_copies", "learned", "deleted", "restarts",
+            "resolvents")
+
+
+class SolverStats:
+    def __init__(self, progress=None, out=None):
+        """
+        'progress' is the interval in seconds between the lines printed to 'out' (the standard error by
+        default) while solving, or None to print nothing.
+        """
+        for counter in COUNTERS:
+            setattr(self, counter, 0)
+        self.times = {}  # phase -> seconds
+        self.progress = progress
+        self.out = out
+        self.start = time.perf_counter()
+        self.next_report = self.start + progress if progress else None
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Adds the time spent inside the 'with' block to the phase 'name'.
+        """
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+
+    def tick(self):
+        """
+        Called by the solvers at each decision or conflict, prints the counters when 'progress' seconds
+        have passed since the last line.
+        """
+        if self.next_report is None:
+            return
+        now = time.perf_counter()
+        if now >= self.next_report:
+            self.next_report = now + self.progress
+            out = self.out if self.out is not None else sys.stderr
+            print(f"[{now - self.start:.1f}s] {self.summary()}", file=out, flush=True)
+
+    def summary(self):
+        return " ".join(f"{counter}={getattr(self, counter)}" for counter in COUNTERS)
+
+    def as_dict(self):
+        result = {counter: getattr(self, counter) for counter in COUNTERS}
+        result["times"] = dict(self.times)
+        return result
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def __str__(self):
+        lines = [f"{counter}: {getattr(self, counter)}" for counter in COUNTERS]
+        lines.extend(f"{name} time: {seconds}" for name, seconds in self.times.items())
+        return "\n".join(lines)
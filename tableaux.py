@@ -1,10 +1,15 @@
 from formula import And, Or, Not, Implies, Atom
 from semantics import truth_value, is_literal
+from stats import SolverStats
 from collections import OrderedDict
 
 
 class Tableaux:
-    def __init__(self, *formula_list):
+    def __init__(self, *formula_list, stats=None):
+        """
+        The work done by solve() is counted in 'stats', a SolverStats, which is created when not given.
+        """
+        self.stats = stats if stats is not None else SolverStats()
         self.formula_list = self.sort_formulas(formula_list)
         self.__was_formula_processed_lookup = {formula: is_literal(formula) for formula in self.formula_list}
         self.__track_branch = []
@@ -21,16 +26,22 @@ class Tableaux:
         Return False if the set of formulas is insatisfiable. Otherwise,
         Return a valuation that makes the set of formulas true.
         """
+        with self.stats.phase("solve"):
+            return self.__solve()
+
+    def __solve(self):
         valuation = {}
         # i = 0
-        for i, formula in enumerate(self.formula_list):
-            formula = self.formula_list[i]
-            # formula = self.get_unprocessed_formula()
-            # print(formula)
-            # if formula is False:
-                # break
-            if not self.__was_formula_processed_lookup[formula] and not self.proccess_formula(formula):
+        if self.__has_complement(self.formula_list):
+            self.stats.conflicts += 1
+            return False
+
+        # a backtrack replaces self.formula_list, so the next formula is looked up again instead of iterated
+        formula = self.get_unprocessed_formula()
+        while formula is not False:
+            if not self.proccess_formula(formula):
                 return False
+            formula = self.get_unprocessed_formula()
         # for i, formula in enumerate(self.formula_list):
             # formula = self.formula_list[i]
 
@@ -91,71 +102,82 @@ class Tableaux:
         self.__was_formula_processed_lookup[formula] = True
         # del self.__was_formula_processed_lookup[formula]
 
+        # n-ary And and Or are read through their operands: building formula.left would create a new node with
+        # all the other operands each time
         if isinstance(formula, And):
-            if formula.left not in self.formula_list:
-                self.formula_list.append(formula.left)
-                self.__was_formula_processed_lookup[formula.left] = is_literal(formula.left)
-            if formula.right not in self.formula_list:
-                self.formula_list.append(formula.right)
-                self.__was_formula_processed_lookup[formula.right] = is_literal(formula.right)
+            for operand in formula.operands:
+                if operand not in self.__was_formula_processed_lookup:
+                    self.formula_list.append(operand)
+                    self.__was_formula_processed_lookup[operand] = is_literal(operand)
 
         elif isinstance(formula, Not) and isinstance(formula.inner, Or):
-            inner = formula.inner
-            left_formula = Not(inner.left)
-            right_formula = Not(inner.right)
-
-            if left_formula not in self.formula_list:
-                self.formula_list.append(left_formula)
-                self.__was_formula_processed_lookup[left_formula] = is_literal(left_formula)
-
-            if right_formula not in self.formula_list:
-                self.formula_list.append(right_formula)
-                self.__was_formula_processed_lookup[right_formula] = is_literal(right_formula)
+            for operand in formula.inner.operands:
+                negated = Not(operand)
+                if negated not in self.__was_formula_processed_lookup:
+                    self.formula_list.append(negated)
+                    self.__was_formula_processed_lookup[negated] = is_literal(negated)
 
         elif isinstance(formula, Not) and isinstance(formula.inner, Implies):
             inner = formula.inner
             left_formula = inner.left
             right_formula = Not(inner.right)
 
-            if left_formula not in self.formula_list:
+            if left_formula not in self.__was_formula_processed_lookup:
                 self.formula_list.append(left_formula)
                 self.__was_formula_processed_lookup[left_formula] = is_literal(left_formula)
 
-            if right_formula not in self.formula_list:
+            if right_formula not in self.__was_formula_processed_lookup:
                 self.formula_list.append(right_formula)
                 self.__was_formula_processed_lookup[right_formula] = is_literal(right_formula)
 
         elif isinstance(formula, Not) and isinstance(formula.inner, Not):
-            if formula.inner.inner not in self.formula_list:
+            if formula.inner.inner not in self.__was_formula_processed_lookup:
                 self.formula_list.append(formula.inner.inner)
                 self.__was_formula_processed_lookup[formula.inner.inner] = is_literal(formula.inner.inner)
 
         elif isinstance(formula, Or):
-            self.__track_branch.append((self.__was_formula_processed_lookup.copy(), formula.left))
+            operands = formula.operands
+            self.__track_branch.append((self.__was_formula_processed_lookup.copy(), operands, len(operands) - 1))
+            self.stats.decisions += 1
+            self.stats.branch_copies += 1
 
-            if formula.right not in self.formula_list:
-                self.formula_list.append(formula.right)
-                self.__was_formula_processed_lookup[formula.right] = is_literal(formula.right)
+            if operands[-1] not in self.__was_formula_processed_lookup:
+                self.formula_list.append(operands[-1])
+                self.__was_formula_processed_lookup[operands[-1]] = is_literal(operands[-1])
 
         elif isinstance(formula, Not) and isinstance(formula.inner, And):
-            self.__track_branch.append((self.__was_formula_processed_lookup.copy(), Not(formula.inner.left)))
+            operands = tuple(Not(operand) for operand in formula.inner.operands)
+            self.__track_branch.append((self.__was_formula_processed_lookup.copy(), operands, len(operands) - 1))
+            self.stats.decisions += 1
+            self.stats.branch_copies += 1
 
-            if Not(formula.inner.right) not in self.formula_list:
-                self.formula_list.append(Not(formula.inner.right))
-                self.__was_formula_processed_lookup[Not(formula.inner.right)] = is_literal(Not(formula.inner.right))
+            if operands[-1] not in self.__was_formula_processed_lookup:
+                self.formula_list.append(operands[-1])
+                self.__was_formula_processed_lookup[operands[-1]] = is_literal(operands[-1])
 
         elif isinstance(formula, Implies):
-            self.__track_branch.append((self.__was_formula_processed_lookup.copy(), Not(formula.left)))
+            self.__track_branch.append((self.__was_formula_processed_lookup.copy(), (Not(formula.left),), 1))
+            self.stats.decisions += 1
+            self.stats.branch_copies += 1
 
-            if formula.right not in self.formula_list:
+            if formula.right not in self.__was_formula_processed_lookup:
                 self.formula_list.append(formula.right)
                 self.__was_formula_processed_lookup[formula.right] = is_literal(formula.right)
 
         while self.__has_complement(list(self.__was_formula_processed_lookup)):
+            self.stats.conflicts += 1
+            self.stats.tick()
             if not self.__track_branch:
                 return False
 
-            was_processed_list_old, formula = self.__track_branch.pop(-1)
+            self.stats.backtracks += 1
+            # the branches left are the first 'remaining' alternatives, tried from the last one
+            was_processed_list_old, alternatives, remaining = self.__track_branch.pop(-1)
+            formula = alternatives[remaining - 1]
+            if remaining > 1:
+                self.__track_branch.append((was_processed_list_old.copy(), alternatives, remaining - 1))
+                self.stats.decisions += 1
+                self.stats.branch_copies += 1
 
             self.formula_list = list(was_processed_list_old.keys())
             self.formula_list.append(formula)
@@ -0,0 +1,146 @@
+"""Bit-parallel truth tables.
+
+Instead of building every valuation as a dictionary and evaluating the formula on each one, a TruthTable
+gives each atom a column of bits, one bit per valuation, and evaluates the formula once over the whole column
+with bitwise AND, OR and NOT, so 2ⁿ valuations cost a few operations per connective.
+
+The columns are packed NumPy arrays of 64-bit words when NumPy is installed, and Python integers otherwise.
+The valuations are split into chunks of 2^chunk_bits rows, so the memory used doesn't grow with the number
+of atoms, only the time does; the first chunk_bits atoms vary inside a chunk and the other ones are fixed for
+the whole chunk.
+
+count_models(Implies(Atom('p'), Atom('q')))  # 3
+is_tautology(Or(Atom('p'), Not(Atom('p'))))  # True
+are_equivalent(Implies(Atom('p'), Atom('q')), Or(Not(Atom('p')), Atom('q')))  # True
+"""
+
+
+from formula import And, Atom, Implies, Not, Or
+from functions import atoms, children, post_order
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+WORD_BITS = 64
+
+
+def alternating(bit, size):
+    """Returns the integer of 'size' bits whose bit b is set when bit 'bit' of b is, the column of atom 'bit'."""
+    period = 2 << bit
+    block = ((1 << (1 << bit)) - 1) << (1 << bit)  # 2^bit zeros then 2^bit ones
+    return block * (((1 << size) - 1) // ((1 << period) - 1)) if period <= size else 0
+
+
+def popcount(value):
+    return bin(value).count("1")
+
+
+class TruthTable:
+    def __init__(self, atomics, chunk_bits=16):
+        """
+        'atomics' is the collection of atoms of the table, for example atoms(formula).
+        """
+        self.names = sorted({atom.name for atom in atomics}, key=str)
+        self.bits = min(len(self.names), chunk_bits)
+        self.size = 1 << self.bits  # valuations per chunk
+        self.num_chunks = 1 << (len(self.names) - self.bits)
+        if numpy is not None:
+            self.words = max(self.size // WORD_BITS, 1)
+            self.full = numpy.full(self.words, (1 << min(self.size, WORD_BITS)) - 1, dtype=numpy.uint64)
+            self.empty = numpy.zeros(self.words, dtype=numpy.uint64)
+        else:
+            self.full = (1 << self.size) - 1
+            self.empty = 0
+
+    def column(self, index, chunk):
+        """
+        Returns the column of the atom 'index' in the chunk 'chunk'.
+        """
+        if index >= self.bits:
+            return self.full if (chunk >> (index - self.bits)) & 1 else self.empty
+        if numpy is None:
+            return alternating(index, self.size)
+        if index < 6:
+            return self.full & numpy.uint64(alternating(index, min(self.size, WORD_BITS)))
+        words = numpy.arange(self.words) >> (index - 6)
+        return numpy.where(words & 1, self.full, self.empty)
+
+    def chunks(self, formula):
+        """
+        Yields the column of 'formula' in each chunk. Every valuation of the chunk is a row, and the row of a
+        valuation is given by the truth values of the atoms in self.names, the first one as the lowest bit.
+        """
+        nodes = list(post_order(formula))
+        uses = {}
+        for node in nodes:
+            for child in children(node):
+                uses[child] = uses.get(child, 0) + 1
+        indexes = {name: index for index, name in enumerate(self.names)}
+
+        for chunk in range(self.num_chunks):
+            values = {}
+            remaining = dict(uses)
+            for node in nodes:
+                operands = [values[child] for child in children(node)]
+                if isinstance(node, Atom):
+                    value = self.column(indexes[node.name], chunk)
+                elif isinstance(node, Not):
+                    value = operands[0] ^ self.full
+                elif isinstance(node, And):
+                    value = operands[0]
+                    for operand in operands[1:]:
+                        value = value & operand
+                elif isinstance(node, Or):
+                    value = operands[0]
+                    for operand in operands[1:]:
+                        value = value | operand
+                elif isinstance(node, Implies):
+                    value = (operands[0] ^ self.full) | operands[1]
+                else:
+                    raise TypeError(f"Not a formula: {node!r}")
+                values[node] = value
+                # drop the columns that no other node needs, so the memory is bounded by the widest level
+                for child in children(node):
+                    remaining[child] -= 1
+                    if remaining[child] == 0:
+                        del values[child]
+            yield values[formula]
+
+    def count(self, column):
+        if numpy is None:
+            return popcount(column)
+        if hasattr(numpy, "bitwise_count"):
+            return int(numpy.bitwise_count(column).sum())
+        return int(numpy.unpackbits(column.view(numpy.uint8)).sum())
+
+    def is_full(self, column):
+        if numpy is None:
+            return column == self.full
+        return bool(numpy.array_equal(column, self.full))
+
+    def is_empty(self, column):
+        if numpy is None:
+            return column == 0
+        return not column.any()
+
+
+def count_models(formula, atomics=None):
+    """Returns the number of valuations of 'atomics' (by default the atoms of formula) that satisfy formula."""
+    table = TruthTable(atoms(formula) if atomics is None else atomics)
+    return sum(table.count(column) for column in table.chunks(formula))
+
+
+def is_tautology(formula):
+    """Returns True if formula is true in every valuation of its atoms."""
+    table = TruthTable(atoms(formula))
+    return all(table.is_full(column) for column in table.chunks(formula))
+
+
+def are_equivalent(formula1, formula2):
+    """Returns True if formula1 and formula2 have the same truth value in every valuation of their atoms."""
+    table = TruthTable(atoms(formula1) | atoms(formula2))
+    difference = Or(And(formula1, Not(formula2)), And(Not(formula1), formula2))
+    return all(table.is_empty(column) for column in table.chunks(difference))
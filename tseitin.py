@@ -0,0 +1,140 @@
+"""Structure-preserving conversion of formulas to clauses in integer (DIMACS) form.
+
+Instead of distributing Or over And, every compound subformula that is not at the top level gets an
+auxiliary variable defined by a few clauses, so the number of clauses grows linearly with the size of the
+formula. With the Plaisted-Greenbaum optimisation only the direction of each definition required by the
+polarity in which the subformula occurs is written.
+
+encoder = TseitinEncoder()
+clauses = encoder.encode(Or(And(Atom('p'), Atom('q')), Atom('r')))
+# [[-1, 2], [-1, 3], [1, 4]], where 1 is the auxiliary variable that stands for (p ∧ q)
+print(encoder.names())  # {2: 'p', 3: 'q', 4: 'r'}
+"""
+
+
+from formula import Atom, Not, And, Or, Implies
+
+
+def conjuncts(formula):
+    """Returns the formulas whose conjunction is equivalent to 'formula', looking through
+    nested And's, negated Or's and Implies and double negations."""
+    result = []
+    stack = [formula]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, And):
+            stack.extend(reversed(current.operands))
+        elif isinstance(current, Not) and isinstance(current.inner, Not):
+            stack.append(current.inner.inner)
+        elif isinstance(current, Not) and isinstance(current.inner, Or):
+            stack.extend(Not(operand) for operand in reversed(current.inner.operands))
+        elif isinstance(current, Not) and isinstance(current.inner, Implies):
+            stack.append(Not(current.inner.right))
+            stack.append(current.inner.left)
+        else:
+            result.append(current)
+    return result
+
+
+def disjuncts(formula):
+    """Returns the formulas whose disjunction is equivalent to 'formula', looking through
+    nested Or's and Implies, negated And's and double negations."""
+    result = []
+    stack = [formula]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, Or):
+            stack.extend(reversed(current.operands))
+        elif isinstance(current, Implies):
+            stack.append(current.right)
+            stack.append(Not(current.left))
+        elif isinstance(current, Not) and isinstance(current.inner, Not):
+            stack.append(current.inner.inner)
+        elif isinstance(current, Not) and isinstance(current.inner, And):
+            stack.extend(Not(operand) for operand in reversed(current.inner.operands))
+        else:
+            result.append(current)
+    return result
+
+
+class TseitinEncoder:
+    def __init__(self, polarity=True):
+        """
+        If 'polarity' is True the Plaisted-Greenbaum encoding is used, otherwise every auxiliary
+        variable is defined as equivalent to its subformula (plain Tseitin encoding).
+        """
+        self.polarity = polarity
+        self.literal_lookup = {}  # same format used by CNFDimacsParser: Atom -> n, Not(Atom) -> -n
+        self.definitions = {}  # subformula -> [variable, positive direction written, negative direction written]
+        self.total_atoms = 0
+        self.clauses = []
+
+    def new_var(self):
+        self.total_atoms += 1
+        return self.total_atoms
+
+    def encode(self, formula):
+        """
+        Returns the clauses that are satisfiable exactly when 'formula' is. The variables and definitions
+        are shared with the previous calls, so many formulas can be encoded into the same clause set.
+        """
+        self.clauses = []
+        for conjunct in conjuncts(formula):
+            self.clauses.append([self.literal(disjunct, 1) for disjunct in disjuncts(conjunct)])
+        return self.clauses
+
+    def literal(self, formula, polarity):
+        """
+        Returns the integer literal that stands for 'formula'. 'polarity' is 1 when the literal only has to
+        imply the formula, -1 when it only has to be implied by it, and 0 when both directions are needed.
+        """
+        if not self.polarity:
+            polarity = 0
+
+        negated = False
+        while isinstance(formula, Not) and isinstance(formula.inner, (Atom, Not)):
+            formula = formula.inner
+            negated = not negated
+            polarity = -polarity
+
+        if isinstance(formula, Atom):
+            if formula not in self.literal_lookup:
+                var = self.new_var()
+                self.literal_lookup[formula] = var
+                self.literal_lookup[Not(formula)] = -var
+            literal = self.literal_lookup[formula]
+            return -literal if negated else literal
+
+        definition = self.definitions.get(formula)
+        if definition is None:
+            definition = [self.new_var(), False, False]
+            self.definitions[formula] = definition
+        var = definition[0]
+
+        operands = conjuncts(formula)
+        if len(operands) > 1:
+            if polarity >= 0 and not definition[1]:
+                definition[1] = True
+                for operand in operands:
+                    self.clauses.append([-var, self.literal(operand, 1)])
+            if polarity <= 0 and not definition[2]:
+                definition[2] = True
+                self.clauses.append([var] + [-self.literal(operand, -1) for operand in operands])
+        else:
+            operands = disjuncts(formula)
+            if polarity >= 0 and not definition[1]:
+                definition[1] = True
+                self.clauses.append([-var] + [self.literal(operand, 1) for operand in operands])
+            if polarity <= 0 and not definition[2]:
+                definition[2] = True
+                for operand in operands:
+                    self.clauses.append([var, -self.literal(operand, -1)])
+
+        return -var if negated else var
+
+    def names(self):
+        """
+        Returns the map from the variables of the original atoms to their names, for example {1: 'p', 3: 'r'}.
+        Auxiliary variables are not included.
+        """
+        return {var: atom.name for atom, var in self.literal_lookup.items() if isinstance(atom, Atom)}